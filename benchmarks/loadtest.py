@@ -0,0 +1,247 @@
+"""Seed the Cat Mission API and replay a weighted JSONL scenario at fixed concurrency.
+
+Run with ``python -m benchmarks.loadtest --scenario benchmarks/scenarios/mixed.jsonl``.
+Without ``--base-url`` the app in ``main.py`` is driven in-process, against the
+database configured in ``.env``. The report (per-endpoint p50/p95/p99 latency and
+requests per second) is printed as JSON and optionally written to ``--output``.
+
+Scenario lines look like::
+
+    {"name": "get_cat", "method": "GET", "path": "/cats/{cat_id}", "weight": 20}
+    {"name": "create_note", "method": "POST", "path": "/notes", "weight": 5,
+     "body": {"target_id": "{target_id}", "message": "report {rand}"}}
+
+``{cat_id}``, ``{mission_id}`` and ``{target_id}`` are replaced by random seeded ids,
+``{rand}`` by a random positive integer. A string that is exactly one placeholder
+becomes an integer.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+PLACEHOLDER = re.compile(r"\{(cat_id|mission_id|target_id|rand)\}")
+SEED_BREEDS = ["Persian", "Sphynx", "Siamese", "Maine Coon", "Bengal", "Ragdoll", "Abyssinian", "Birman"]
+SEED_COUNTRIES = ["Argentina", "Uruguay", "Chile", "Peru", "Spain", "Italy"]
+
+
+def load_scenario(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        steps = [json.loads(line) for line in f if line.strip()]
+    for step in steps:
+        step.setdefault("weight", 1)
+        step.setdefault("method", "GET")
+    return steps
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Fixture:
+    """Ids created while seeding, used to fill scenario placeholders."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.ids: Dict[str, List[int]] = {"cat_id": [], "mission_id": [], "target_id": []}
+
+    def value(self, name: str) -> int:
+        if name == "rand":
+            return self.rng.randint(1, 1_000_000)
+        return self.rng.choice(self.ids[name]) if self.ids[name] else 1
+
+    def render(self, template):
+        if isinstance(template, dict):
+            return {key: self.render(value) for key, value in template.items()}
+        if isinstance(template, list):
+            return [self.render(value) for value in template]
+        if isinstance(template, str):
+            whole = PLACEHOLDER.fullmatch(template)
+            if whole:
+                return self.value(whole.group(1))
+            return PLACEHOLDER.sub(lambda match: str(self.value(match.group(1))), template)
+        return template
+
+
+async def _bulk(client: httpx.AsyncClient, path: str, items: List[dict], chunk: int = 1000) -> List[int]:
+    ids = []
+    for start in range(0, len(items), chunk):
+        response = await client.post(path, json=items[start:start + chunk])
+        response.raise_for_status()
+        ids.extend(item["id"] for item in response.json()["items"] if item["status"] == "created")
+    return ids
+
+
+async def seed(client: httpx.AsyncClient, fixture: Fixture, args):
+    rng = fixture.rng
+    cats = [
+        {"name": f"Agent {i}", "years_of_experience": rng.randint(0, 20), "breed": rng.choice(SEED_BREEDS), "salary": rng.randint(1000, 9000)}
+        for i in range(args.cats)
+    ]
+    fixture.ids["cat_id"] = await _bulk(client, "/cats/bulk", cats)
+
+    missions = [
+        {
+            "title": f"Operation {i}",
+            "status": "pending",
+            "assigned_cat": rng.choice(fixture.ids["cat_id"]) if fixture.ids["cat_id"] and rng.random() < 0.5 else None,
+            "targets": [
+                {"name": f"Target {i}.{t}", "country": rng.choice(SEED_COUNTRIES), "status": "pending"}
+                for t in range(args.targets_per_mission)
+            ],
+        }
+        for i in range(args.missions)
+    ]
+    fixture.ids["mission_id"] = await _bulk(client, "/missions/bulk", missions)
+
+    cursor = None
+    while True:
+        params = {"limit": 500, "expand": "targets"}
+        if cursor:
+            params["cursor"] = cursor
+        page = (await client.get("/missions", params=params)).json()
+        fixture.ids["target_id"].extend(target["id"] for mission in page["items"] for target in mission["targets"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    if fixture.ids["target_id"]:
+        notes = [
+            {"target_id": rng.choice(fixture.ids["target_id"]), "message": f"Seed note {i}"}
+            for i in range(args.notes)
+        ]
+        await _bulk(client, "/notes/bulk", notes)
+
+
+async def replay(client: httpx.AsyncClient, fixture: Fixture, steps: List[dict], args) -> dict:
+    latencies: Dict[str, List[float]] = {step["name"]: [] for step in steps}
+    statuses: Dict[str, Dict[str, int]] = {step["name"]: {} for step in steps}
+    weights = [step["weight"] for step in steps]
+    deadline = time.perf_counter() + args.duration
+    remaining = [args.requests] if args.requests else None
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            step = fixture.rng.choices(steps, weights)[0]
+            body = fixture.render(step["body"]) if "body" in step else None
+            started = time.perf_counter()
+            try:
+                response = await client.request(step["method"], fixture.render(step["path"]), json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies[step["name"]].append(time.perf_counter() - started)
+            statuses[step["name"]][status] = statuses[step["name"]].get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    def summarize(values: List[float], codes: Dict[str, int]) -> dict:
+        values = sorted(values)
+        return {
+            "requests": len(values),
+            "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+            "statuses": codes,
+        }
+
+    all_codes: Dict[str, int] = {}
+    for codes in statuses.values():
+        for code, count in codes.items():
+            all_codes[code] = all_codes.get(code, 0) + count
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "total": summarize([v for values in latencies.values() for v in values], all_codes),
+        "endpoints": {name: summarize(latencies[name], statuses[name]) for name in latencies if latencies[name]},
+    }
+
+
+async def run(args) -> dict:
+    fixture = Fixture(random.Random(args.seed))
+    steps = load_scenario(args.scenario)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+            return await _run_with_client(client, fixture, steps, args)
+
+    import main
+    from services.breeds import BreedCatalog
+
+    async def seed_breeds():
+        return SEED_BREEDS
+
+    main.database.breed_catalog = BreedCatalog(fetcher=seed_breeds, snapshot_path=None)
+    await main.database.startup()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            return await _run_with_client(client, fixture, steps, args)
+    finally:
+        await main.database.shutdown()
+
+
+async def _run_with_client(client: httpx.AsyncClient, fixture: Fixture, steps: List[dict], args) -> dict:
+    seed_started = time.perf_counter()
+    await seed(client, fixture, args)
+    report = {
+        "scenario": args.scenario,
+        "target": args.base_url or "in-process",
+        "concurrency": args.concurrency,
+        "seed": {
+            "cats": len(fixture.ids["cat_id"]),
+            "missions": len(fixture.ids["mission_id"]),
+            "targets": len(fixture.ids["target_id"]),
+            "notes": args.notes,
+            "seconds": round(time.perf_counter() - seed_started, 3),
+        },
+    }
+    report.update(await replay(client, fixture, steps, args))
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", default="benchmarks/scenarios/mixed.jsonl")
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to replay for")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0 = duration only)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--cats", type=int, default=1000)
+    parser.add_argument("--missions", type=int, default=2000)
+    parser.add_argument("--targets-per-mission", type=int, default=3, choices=(1, 2, 3))
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data and request mix")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
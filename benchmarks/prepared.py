@@ -0,0 +1,55 @@
+"""Per-call latency of hot queries: parsed on every call vs. prepared by the QueryRegistry.
+
+Run with ``python -m benchmarks.prepared [calls]`` against the database configured in
+``.env`` (the schema must already be migrated; ids that do not exist still measure the
+round trip). The unprepared connection has asyncpg's statement cache disabled, so each
+call sends Parse/Bind/Execute and Postgres parses and plans the statement again.
+"""
+import asyncio
+import sys
+import time
+
+import asyncpg
+
+from constants.keys import KEYS
+from services.db import NOTES_START
+from services.queries import QueryRegistry
+
+HOT_QUERIES = {
+    "get_cat": (1,),
+    "get_mission": (1,),
+    "get_mission_tree_with_notes": (1,),
+    "list_cats_by_breed": (0, "Persian", 50),
+    "list_notes_by_target": (NOTES_START, NOTES_START, 0, 1, 50),
+}
+
+
+async def measure(conn, registry: QueryRegistry, name: str, args, calls: int) -> float:
+    for _ in range(10):
+        await registry.fetch(conn, name, *args)
+    started = time.perf_counter()
+    for _ in range(calls):
+        await registry.fetch(conn, name, *args)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    registry = QueryRegistry()
+    unprepared = await asyncpg.connect(KEYS["DATABASE_URL"], statement_cache_size=0)
+    prepared = await asyncpg.connect(KEYS["DATABASE_URL"], statement_cache_size=KEYS["DB_STATEMENT_CACHE_SIZE"])
+    await registry.init_connection(unprepared)
+    await registry.init_connection(prepared)
+    try:
+        print(f"{'query':<30} {'unprepared':>12} {'prepared':>12} {'saved':>10}")
+        for name, args in HOT_QUERIES.items():
+            before = await measure(unprepared, registry, name, args, calls)
+            after = await measure(prepared, registry, name, args, calls)
+            print(f"{name:<30} {before:9.1f} us {after:9.1f} us {before - after:7.1f} us")
+    finally:
+        await unprepared.close()
+        await prepared.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
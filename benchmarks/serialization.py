@@ -0,0 +1,64 @@
+"""Per-row cost of serializing list pages: Pydantic response models vs. the orjson fast path.
+
+Run with ``python -m benchmarks.serialization [rows] [repeat]``.
+"""
+import json
+import sys
+import timeit
+
+from pydantic import TypeAdapter
+
+from utils.schemas import CatPage, CatResponse, MissionPage, MissionResponse
+from utils.serialization import page_response
+
+
+def make_cats(count):
+    return [
+        {"id": i, "name": f"Cat {i}", "years_of_experience": i % 20, "breed": "Persian", "salary": 1000 + i}
+        for i in range(1, count + 1)
+    ]
+
+
+def make_missions(count):
+    return [
+        {"id": i, "assigned_cat": i if i % 2 else None, "status": "in_progress", "title": f"Mission {i}"}
+        for i in range(1, count + 1)
+    ]
+
+
+def pydantic_path(rows, page_model, item_model):
+    # What the handlers did before: build one model per row, then FastAPI validates
+    # the return value against response_model, dumps it and encodes with json.dumps.
+    page = page_model(items=[item_model(**row) for row in rows], next_cursor="eyJpZCI6MX0")
+    adapter = TypeAdapter(page_model)
+    data = adapter.dump_python(adapter.validate_python(page), mode="json")
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def orjson_path(rows, item_model):
+    return page_response(rows, item_model, "eyJpZCI6MX0").body
+
+
+def measure(label, func, rows, repeat):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    per_row_us = best / len(rows) * 1e6
+    print(f"{label:<28} {best * 1e3:9.2f} ms/page {per_row_us:8.3f} us/row")
+    return per_row_us
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    for name, rows, page_model, item_model in (
+        ("cats", make_cats(count), CatPage, CatResponse),
+        ("missions", make_missions(count), MissionPage, MissionResponse),
+    ):
+        assert json.loads(pydantic_path(rows, page_model, item_model)) == json.loads(orjson_path(rows, item_model))
+        print(f"{name} ({count} rows)")
+        before = measure("  pydantic + json.dumps", lambda: pydantic_path(rows, page_model, item_model), rows, repeat)
+        after = measure("  orjson fast path", lambda: orjson_path(rows, item_model), rows, repeat)
+        print(f"  speedup {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
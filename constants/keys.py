@@ -9,6 +9,67 @@ HOST = os.getenv("DB_HOST", "localhost")
 PORT = os.getenv("DB_PORT", "5432")
 TARGET_DB = os.getenv("DB_NAME", "developsToday")
 
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "10"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "2"))
+DB_POOL_RETRY_AFTER = int(os.getenv("DB_POOL_RETRY_AFTER", "1"))
+DB_POOL_MAX_QUERIES = int(os.getenv("DB_POOL_MAX_QUERIES", "50000"))
+DB_MAX_INACTIVE_CONNECTION_LIFETIME = float(os.getenv("DB_MAX_INACTIVE_CONNECTION_LIFETIME", "300"))
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "0")) or None
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+# Fits under Postgres's default max_connections=100, with room for admin sessions.
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", "90"))
+
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "2"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+# Worker processes sharing DB_CONNECTION_BUDGET; 0 (unset) means a single process.
+# serve.py defaults its workers to the number of CPU cores and exports the count.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))
+SHUTDOWN_DRAIN_SECONDS = int(os.getenv("SHUTDOWN_DRAIN_SECONDS", "30"))
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "postgres").lower()
+MEMORY_SNAPSHOT_PATH = os.getenv("MEMORY_SNAPSHOT_PATH", "")
+MEMORY_SNAPSHOT_INTERVAL = float(os.getenv("MEMORY_SNAPSHOT_INTERVAL", "60"))
+
+BREEDS_API_URL = os.getenv("BREEDS_API_URL", "https://api.thecatapi.com/v1/breeds")
+BREEDS_TTL_SECONDS = float(os.getenv("BREEDS_TTL_SECONDS", "86400"))
+BREEDS_SNAPSHOT_PATH = os.getenv("BREEDS_SNAPSHOT_PATH", "breeds_snapshot.json")
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "50000"))
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+CACHE_NOTIFY = os.getenv("CACHE_NOTIFY", "false").lower() in ("1", "true", "yes")
+
+NOTES_GROUP_COMMIT = os.getenv("NOTES_GROUP_COMMIT", "false").lower() in ("1", "true", "yes")
+NOTES_GROUP_COMMIT_MAX_BATCH = int(os.getenv("NOTES_GROUP_COMMIT_MAX_BATCH", "500"))
+NOTES_GROUP_COMMIT_MAX_DELAY_MS = float(os.getenv("NOTES_GROUP_COMMIT_MAX_DELAY_MS", "5"))
+
+MISSION_EVENTS_QUEUE_SIZE = int(os.getenv("MISSION_EVENTS_QUEUE_SIZE", "1000"))
+MISSION_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("MISSION_EVENTS_KEEPALIVE_SECONDS", "15"))
+MISSION_EVENTS_HISTORY = int(os.getenv("MISSION_EVENTS_HISTORY", "10000"))
+MISSION_EVENTS_GAP_SECONDS = float(os.getenv("MISSION_EVENTS_GAP_SECONDS", "60"))
+MISSION_EVENTS_RETENTION_HOURS = float(os.getenv("MISSION_EVENTS_RETENTION_HOURS", "168"))
+
+STATS_COMPACT_INTERVAL = float(os.getenv("STATS_COMPACT_INTERVAL", "10"))
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "30"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+NOTES_PARTITIONS_AHEAD = int(os.getenv("NOTES_PARTITIONS_AHEAD", "3"))
+NOTES_RETENTION_MONTHS = int(os.getenv("NOTES_RETENTION_MONTHS", "12"))
+NOTES_ARCHIVE_DIR = os.getenv("NOTES_ARCHIVE_DIR", "archive")
+
+CAT_MAX_ACTIVE_MISSIONS = int(os.getenv("CAT_MAX_ACTIVE_MISSIONS", "1"))
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+
 KEYS = {
     "USER": USER,
     "PASSWORD": PASSWORD,
@@ -16,5 +77,49 @@ KEYS = {
     "PORT": PORT,
     "TARGET_DB": TARGET_DB,
     "DATABASE_URL": f"postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/{TARGET_DB}",
-    "DEFAULT_DB_URL": f"postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/postgres"
+    "DEFAULT_DB_URL": f"postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/postgres",
+    "DB_POOL_MIN_SIZE": DB_POOL_MIN_SIZE,
+    "DB_POOL_MAX_SIZE": DB_POOL_MAX_SIZE,
+    "DB_POOL_ACQUIRE_TIMEOUT": DB_POOL_ACQUIRE_TIMEOUT,
+    "DB_POOL_RETRY_AFTER": DB_POOL_RETRY_AFTER,
+    "DB_POOL_MAX_QUERIES": DB_POOL_MAX_QUERIES,
+    "DB_MAX_INACTIVE_CONNECTION_LIFETIME": DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+    "DB_COMMAND_TIMEOUT": DB_COMMAND_TIMEOUT,
+    "DB_STATEMENT_CACHE_SIZE": DB_STATEMENT_CACHE_SIZE,
+    "DB_CONNECTION_BUDGET": DB_CONNECTION_BUDGET,
+    "DB_REPLICA_URLS": DB_REPLICA_URLS,
+    "DB_REPLICA_CHECK_INTERVAL": DB_REPLICA_CHECK_INTERVAL,
+    "READ_YOUR_WRITES_SECONDS": READ_YOUR_WRITES_SECONDS,
+    "SERVER_HOST": SERVER_HOST,
+    "SERVER_PORT": SERVER_PORT,
+    "WEB_CONCURRENCY": WEB_CONCURRENCY,
+    "SHUTDOWN_DRAIN_SECONDS": SHUTDOWN_DRAIN_SECONDS,
+    "STORAGE_BACKEND": STORAGE_BACKEND,
+    "MEMORY_SNAPSHOT_PATH": MEMORY_SNAPSHOT_PATH,
+    "MEMORY_SNAPSHOT_INTERVAL": MEMORY_SNAPSHOT_INTERVAL,
+    "BREEDS_API_URL": BREEDS_API_URL,
+    "BREEDS_TTL_SECONDS": BREEDS_TTL_SECONDS,
+    "BREEDS_SNAPSHOT_PATH": BREEDS_SNAPSHOT_PATH,
+    "BULK_CHUNK_SIZE": BULK_CHUNK_SIZE,
+    "BULK_MAX_ITEMS": BULK_MAX_ITEMS,
+    "CACHE_MAX_ENTRIES": CACHE_MAX_ENTRIES,
+    "CACHE_TTL_SECONDS": CACHE_TTL_SECONDS,
+    "CACHE_NOTIFY": CACHE_NOTIFY,
+    "NOTES_GROUP_COMMIT": NOTES_GROUP_COMMIT,
+    "NOTES_GROUP_COMMIT_MAX_BATCH": NOTES_GROUP_COMMIT_MAX_BATCH,
+    "NOTES_GROUP_COMMIT_MAX_DELAY_MS": NOTES_GROUP_COMMIT_MAX_DELAY_MS,
+    "MISSION_EVENTS_QUEUE_SIZE": MISSION_EVENTS_QUEUE_SIZE,
+    "MISSION_EVENTS_KEEPALIVE_SECONDS": MISSION_EVENTS_KEEPALIVE_SECONDS,
+    "MISSION_EVENTS_HISTORY": MISSION_EVENTS_HISTORY,
+    "MISSION_EVENTS_GAP_SECONDS": MISSION_EVENTS_GAP_SECONDS,
+    "MISSION_EVENTS_RETENTION_HOURS": MISSION_EVENTS_RETENTION_HOURS,
+    "STATS_COMPACT_INTERVAL": STATS_COMPACT_INTERVAL,
+    "IDEMPOTENCY_TTL_SECONDS": IDEMPOTENCY_TTL_SECONDS,
+    "IDEMPOTENCY_LOCK_SECONDS": IDEMPOTENCY_LOCK_SECONDS,
+    "IDEMPOTENCY_MAX_KEYS": IDEMPOTENCY_MAX_KEYS,
+    "NOTES_PARTITIONS_AHEAD": NOTES_PARTITIONS_AHEAD,
+    "NOTES_RETENTION_MONTHS": NOTES_RETENTION_MONTHS,
+    "NOTES_ARCHIVE_DIR": NOTES_ARCHIVE_DIR,
+    "CAT_MAX_ACTIVE_MISSIONS": CAT_MAX_ACTIVE_MISSIONS,
+    "SLOW_QUERY_MS": SLOW_QUERY_MS,
 }
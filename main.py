@@ -1,19 +1,48 @@
 import asyncio
+import orjson
+from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import Union, List
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional, Union
 
-from services.db import Database
+from constants.keys import KEYS
+from services.backend import EXPORT_FORMATS, EXPORT_TABLES, NotFoundError, StorageBackend, create_database
+from services.events import EventCursor
+from services.pool import PoolExhaustedError
+from services.replicas import ReadYourWritesMiddleware
+from services.idempotency import IdempotencyMiddleware
+from services.metrics import REGISTRY, MetricsMiddleware, sample_lines
 from models.models import Cat, Mission, Target, Note, StatusType
 from utils.schemas import (
     CatCreate, CatResponse, TargetCreate, MissionCreate, 
     MissionResponse, TargetResponse, NoteCreate, NoteResponse,
-    SalaryUpdate, StatusUpdate, CatAssignment
+    SalaryUpdate, StatusUpdate, CatAssignment, CatPage, AvailableCat, AvailableCatList, AutoAssignResult, MissionPage, NotePage, NoteSearchHit, NoteSearchPage, BulkResult,
+    MissionDetailResponse, MissionDetailPage, TargetStatusChange, TargetStatusBatchResult
 )
+from utils.bulk import read_bulk_payload, validate_items, collect_results, collect_status_results
+from utils.serialization import ORJSONBytesResponse, document_page_response, page_response, record_response, record_to_dict, sse_message
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_created_cursor, decode_cursor, decode_ranked_cursor,
+    paginate, paginate_created, paginate_ranked,
+)
+from utils.etags import etag_matches, versions_etag
+
+database = create_database()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect when a worker starts; on shutdown the server has already drained its requests."""
+    await database.startup()
+    try:
+        yield
+    finally:
+        await database.shutdown()
 
-app = FastAPI(title="Cat Mission API", version="1.0.0")
+app = FastAPI(title="Cat Mission API", version="1.0.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],            
@@ -21,23 +50,67 @@ app.add_middleware(
     allow_methods=["*"],              
     allow_headers=["*"],              
 )
-
-database = Database()
+app.add_middleware(IdempotencyMiddleware, backend=database)
+app.add_middleware(MetricsMiddleware)
+if KEYS["DB_REPLICA_URLS"]:
+    app.add_middleware(ReadYourWritesMiddleware)
 
 async def get_database():
     return database
 
-@app.on_event("startup")
-async def startup_event():
-    await database.startup()
+def collect_database_metrics():
+    pool = database.pool_stats()
+    yield from sample_lines(
+        "db_pool_connections", "Pooled connections by state", "gauge", ("state",),
+        {(state,): pool[state] for state in ("in_use", "idle") if state in pool},
+    )
+    for name, key, type, help in (
+        ("db_pool_waiting", "waiting", "gauge", "Requests waiting for a pooled connection"),
+        ("db_pool_acquire_timeouts_total", "timeouts", "counter", "Acquires that timed out and returned 503"),
+        ("db_pool_acquire_wait_seconds_total", "wait_seconds_total", "counter", "Total time spent waiting for connections"),
+        ("db_pool_acquires_total", "acquires", "counter", "Connections handed out by the pool"),
+    ):
+        if key in pool:
+            yield from sample_lines(name, help, type, (), {(): pool[key]})
+    caches = database.cache_stats()
+    for counter in ("hits", "misses", "coalesced", "invalidations"):
+        yield from sample_lines(
+            f"entity_cache_{counter}_total", f"Entity cache {counter}", "counter", ("cache",),
+            {(kind,): stats[counter] for kind, stats in caches.items()},
+        )
+
+REGISTRY.add_collector(collect_database_metrics)
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    await database.shutdown()
+@app.exception_handler(PoolExhaustedError)
+async def pool_exhausted_handler(request: Request, exc: PoolExhaustedError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(KEYS["DB_POOL_RETRY_AFTER"])},
+    )
+
+async def check_etag(request: Request, db: StorageBackend, tables) -> str:
+    """ETag of a response read from tables; answers 304 if the client already has it.
+
+    Versions are read before the data, so a write landing in between can only leave the
+    ETag older than the body (one extra full response later), never a stale 304. They
+    are kept in request.state.table_versions: reads served from a cache must pass them
+    on as min_version, or a row cached before another worker's write would go out
+    under the newer ETag.
+    """
+    request.state.table_versions = await db.table_versions(tables)
+    etag = versions_etag(request.state.table_versions)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+    return etag
+
+def with_etag(response, etag: str):
+    response.headers["ETag"] = etag
+    return response
 
 # Cat endpoints
 @app.post("/cats", response_model=CatResponse, status_code=201)
-async def create_cat(cat_data: CatCreate, db: Database = Depends(get_database)):
+async def create_cat(cat_data: CatCreate, db: StorageBackend = Depends(get_database)):
     """Create a new cat"""
     try:
         cat = Cat(
@@ -56,158 +129,361 @@ async def create_cat(cat_data: CatCreate, db: Database = Depends(get_database)):
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@app.get("/cats", response_model=List[CatResponse])
-async def get_cats(db: Database = Depends(get_database)):
-    """Get all cats"""
+@app.post("/cats/bulk", response_model=BulkResult)
+async def create_cats_bulk(request: Request, db: StorageBackend = Depends(get_database)):
+    """Create many cats from a JSON array or an NDJSON stream"""
     try:
-        cats = await db.get_cats()
-        return [CatResponse(
-            id=cat['id'],
-            name=cat['name'],
-            years_of_experience=cat['years_of_experience'],
-            breed=cat['breed'],
-            salary=cat['salary']
-        ) for cat in cats]
+        valid, errors = validate_items(await read_bulk_payload(request), CatCreate)
+        outcomes = await db.create_cats_bulk([Cat(**cat_data.model_dump()) for _, cat_data in valid])
+        return collect_results([index for index, _ in valid], outcomes, errors)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/cats", response_model=CatPage)
+async def get_cats(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    breed: Optional[str] = None,
+    db: StorageBackend = Depends(get_database),
+):
+    """Get a page of cats, optionally filtered by breed"""
+    try:
+        etag = await check_etag(request, db, ("cats",))
+        cats = await db.get_cats(limit + 1, decode_cursor(cursor), breed=breed)
+        cats, next_cursor = paginate(cats, limit)
+        return with_etag(page_response(cats, CatResponse, next_cursor), etag)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Declared before /cats/{cat_id} so "available" is not parsed as an id.
+@app.get("/cats/available", response_model=AvailableCatList)
+async def get_available_cats(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    max_active_missions: int = Query(KEYS["CAT_MAX_ACTIVE_MISSIONS"], ge=1, description="Only cats with fewer active missions"),
+    db: StorageBackend = Depends(get_database),
+):
+    """Get the best candidates for a mission: least loaded, then most experienced, then cheapest cats"""
+    try:
+        etag = await check_etag(request, db, ("cats", "missions"))
+        cats = await db.get_available_cats(limit, max_active_missions)
+        return with_etag(ORJSONBytesResponse(orjson.dumps({"items": [record_to_dict(cat, AvailableCat) for cat in cats]})), etag)
+    except HTTPException:
+        raise
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/cats/{cat_id}", response_model=CatResponse)
-async def get_cat(cat_id: int, db: Database = Depends(get_database)):
+async def get_cat(cat_id: int, request: Request, db: StorageBackend = Depends(get_database)):
     """Get a specific cat by ID"""
     try:
-        cat = await db.get_cat(cat_id)
+        etag = await check_etag(request, db, ("cats",))
+        cat = await db.get_cat(cat_id, min_version=request.state.table_versions["cats"])
         if not cat:
             raise HTTPException(status_code=404, detail="Cat not found")
-        return CatResponse(
-            id=cat['id'],
-            name=cat['name'],
-            years_of_experience=cat['years_of_experience'],
-            breed=cat['breed'],
-            salary=cat['salary']
-        )
+        return with_etag(record_response(cat, CatResponse), etag)
     except HTTPException:
         raise
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/cats/{cat_id}")
-async def delete_cat(cat_id: int, db: Database = Depends(get_database)):
+async def delete_cat(cat_id: int, db: StorageBackend = Depends(get_database)):
     """Delete a cat by ID"""
     try:
         await db.delete_cat(cat_id)
         return {"message": "Cat deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.patch("/cats/{cat_id}/salary")
-async def update_cat_salary(cat_id: int, salary_update: SalaryUpdate, db: Database = Depends(get_database)):
+async def update_cat_salary(cat_id: int, salary_update: SalaryUpdate, db: StorageBackend = Depends(get_database)):
     """Update a cat's salary"""
     try:
         if cat_id <= 0:
             raise HTTPException(status_code=400, detail="Cat ID must be positive")
         
-        # Check if cat exists
-        cat = await db.get_cat(cat_id)
-        if not cat:
-            raise HTTPException(status_code=404, detail="Cat not found")
-        
         await db.update_cat_salary(cat_id, salary_update.salary)
         return {"message": "Cat salary updated successfully"}
     except HTTPException:
         raise
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Mission endpoints
 @app.post("/missions", response_model=dict, status_code=201)
-async def create_mission(mission_data: MissionCreate, db: Database = Depends(get_database)):
+async def create_mission(mission_data: MissionCreate, db: StorageBackend = Depends(get_database)):
     """Create a new mission with targets"""
     try:
-        if mission_data.assigned_cat:
-            cat = await db.get_cat(mission_data.assigned_cat)
-            if not cat:
-                raise HTTPException(status_code=400, detail="Assigned cat does not exist")
-        
         mission_id = await db.create_mission(mission_data)
         return {"mission_id": mission_id, "message": "Mission created successfully"}
     except HTTPException:
         raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@app.get("/missions", response_model=List[MissionResponse])
-async def get_missions(db: Database = Depends(get_database)):
-    """Get all missions"""
+@app.post("/missions/bulk", response_model=BulkResult)
+async def create_missions_bulk(request: Request, db: StorageBackend = Depends(get_database)):
+    """Create many missions with their targets from a JSON array or an NDJSON stream"""
+    try:
+        valid, errors = validate_items(await read_bulk_payload(request), MissionCreate)
+        outcomes = await db.create_missions_bulk([mission_data for _, mission_data in valid])
+        return collect_results([index for index, _ in valid], outcomes, errors)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+MISSION_EXPANSIONS = ("targets", "notes")
+
+def parse_mission_expand(expand: Optional[str]) -> set:
+    parts = {part.strip() for part in expand.split(",") if part.strip()} if expand else set()
+    unknown = parts.difference(MISSION_EXPANSIONS)
+    if unknown:
+        raise ValueError(f"Unknown expand value: {', '.join(sorted(unknown))}")
+    return parts
+
+def mission_tables(expansions: set) -> tuple:
+    return ("missions",) + tuple(part for part in MISSION_EXPANSIONS if part in expansions)
+
+@app.get("/missions", response_model=MissionDetailPage)
+async def get_missions(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[StatusType] = None,
+    assigned_cat: Optional[int] = None,
+    expand: Optional[str] = Query(None, description="Comma separated: targets, notes"),
+    db: StorageBackend = Depends(get_database),
+):
+    """Get a page of missions, optionally filtered by status or assigned cat and expanded with targets and notes"""
     try:
-        missions = await db.get_missions()
-        return [MissionResponse(
-            id=mission['id'],
-            assigned_cat=mission['assigned_cat'],
-            status=mission['status'],
-            title=mission['title']
-        ) for mission in missions]
+        expansions = parse_mission_expand(expand)
+        after_id = decode_cursor(cursor)
+        etag = await check_etag(request, db, mission_tables(expansions))
+        if expansions:
+            missions = await db.get_mission_trees(
+                limit + 1, after_id, status=status, assigned_cat=assigned_cat, include_notes="notes" in expansions
+            )
+            missions, next_cursor = paginate(missions, limit)
+            return with_etag(document_page_response([mission['document'] for mission in missions], next_cursor), etag)
+        missions = await db.get_missions(limit + 1, after_id, status=status, assigned_cat=assigned_cat)
+        missions, next_cursor = paginate(missions, limit)
+        return with_etag(page_response(missions, MissionResponse, next_cursor), etag)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/missions/{mission_id}", response_model=MissionResponse)
-async def get_mission(mission_id: int, db: Database = Depends(get_database)):
-    """Get a specific mission by ID"""
+def parse_last_event_id(value: Optional[str]) -> Optional[EventCursor]:
+    if value is None or value == "":
+        return None
     try:
-        mission = await db.get_mission(mission_id)
+        return EventCursor.parse(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+# Declared before /missions/{mission_id} so "stream" is not parsed as an id.
+@app.get("/missions/stream")
+async def stream_mission_events(
+    request: Request,
+    mission_id: Optional[List[int]] = Query(None, description="Only events of these missions"),
+    last_event_id: Optional[str] = Query(None, description="Resume from this event cursor (or send Last-Event-ID)"),
+    db: StorageBackend = Depends(get_database),
+):
+    """Stream mission and target status changes as Server-Sent Events"""
+    after = parse_last_event_id(request.headers.get("last-event-id") or last_event_id)
+
+    async def messages():
+        async for item in db.events.stream(db.get_mission_events, mission_id, after):
+            yield sse_message(*item) if item is not None else b": keepalive\n\n"
+
+    return StreamingResponse(
+        messages(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/missions/stream/ws")
+async def stream_mission_events_ws(
+    websocket: WebSocket,
+    mission_id: Optional[List[int]] = Query(None),
+    last_event_id: Optional[str] = Query(None),
+    db: StorageBackend = Depends(get_database),
+):
+    """Stream mission and target status changes as JSON WebSocket messages"""
+    try:
+        after = EventCursor.parse(last_event_id) if last_event_id else None
+    except ValueError:
+        await websocket.close(code=1008, reason="Invalid last_event_id")
+        return
+    await websocket.accept()
+
+    async def forward():
+        async for item in db.events.stream(db.get_mission_events, mission_id, after):
+            if item is not None:
+                event, cursor = item
+                await websocket.send_text(orjson.dumps({**event, "cursor": cursor}).decode())
+
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    sender, receiver = asyncio.ensure_future(forward()), asyncio.ensure_future(wait_for_disconnect())
+    done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    if sender in done:
+        # The subscriber fell behind (or sending failed); the client should resume from its last cursor.
+        try:
+            await websocket.close(code=1013)
+        except RuntimeError:
+            pass
+
+@app.get("/missions/{mission_id}", response_model=MissionDetailResponse)
+async def get_mission(
+    mission_id: int,
+    request: Request,
+    expand: Optional[str] = Query(None, description="Comma separated: targets, notes"),
+    db: StorageBackend = Depends(get_database),
+):
+    """Get a specific mission by ID, optionally expanded with its targets and notes"""
+    try:
+        expansions = parse_mission_expand(expand)
+        etag = await check_etag(request, db, mission_tables(expansions))
+        if expansions:
+            document = await db.get_mission_tree(mission_id, include_notes="notes" in expansions)
+            if document is None:
+                raise HTTPException(status_code=404, detail="Mission not found")
+            return with_etag(ORJSONBytesResponse(document.encode()), etag)
+        mission = await db.get_mission(mission_id, min_version=request.state.table_versions["missions"])
         if not mission:
             raise HTTPException(status_code=404, detail="Mission not found")
-        return MissionResponse(
-            id=mission['id'],
-            assigned_cat=mission['assigned_cat'],
-            status=mission['status'],
-            title=mission['title']
-        )
+        return with_etag(record_response(mission, MissionResponse), etag)
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/missions/{mission_id}")
-async def delete_mission(mission_id: int, db: Database = Depends(get_database)):
+async def delete_mission(mission_id: int, db: StorageBackend = Depends(get_database)):
     """Delete a mission by ID"""
     try:
         await db.delete_mission(mission_id)
         return {"message": "Mission deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.patch("/missions/{mission_id}/assign-cat")
-async def assign_cat_to_mission(mission_id: int, assignment: CatAssignment, db: Database = Depends(get_database)):
+async def assign_cat_to_mission(mission_id: int, assignment: CatAssignment, db: StorageBackend = Depends(get_database)):
     """Assign a cat to a mission"""
     try:
         if mission_id <= 0:
             raise HTTPException(status_code=400, detail="Mission ID must be positive")
         
-        cat = await db.get_cat(assignment.cat_id)
-        if not cat:
-            raise HTTPException(status_code=404, detail="Cat not found")
-        
         await db.assign_cat_to_mission(mission_id, assignment.cat_id)
         return {"message": "Cat assigned to mission successfully"}
     except HTTPException:
         raise
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.post("/missions/{mission_id}/auto-assign", response_model=AutoAssignResult)
+async def auto_assign_cat(
+    mission_id: int,
+    max_active_missions: int = Query(KEYS["CAT_MAX_ACTIVE_MISSIONS"], ge=1, description="Only cats with fewer active missions"),
+    db: StorageBackend = Depends(get_database),
+):
+    """Assign the best available cat (as ranked by GET /cats/available) to a mission"""
+    try:
+        if mission_id <= 0:
+            raise HTTPException(status_code=400, detail="Mission ID must be positive")
+        cat = await db.auto_assign_cat(mission_id, max_active_missions)
+        if cat is None:
+            raise HTTPException(status_code=409, detail="No cat is available")
+        return ORJSONBytesResponse(orjson.dumps({"mission_id": mission_id, "cat": record_to_dict(cat, AvailableCat)}))
+    except HTTPException:
+        raise
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Target endpoints
+
+@app.patch("/targets/status", response_model=TargetStatusBatchResult)
+async def update_target_statuses(request: Request, db: StorageBackend = Depends(get_database)):
+    """Update the status of many targets in one transaction, from a JSON array or an NDJSON stream"""
+    try:
+        valid, errors = validate_items(await read_bulk_payload(request), TargetStatusChange)
+        changes = [(change.target_id, change.status) for _, change in valid]
+        outcomes = await db.update_target_statuses(changes) if changes else []
+        return collect_status_results(
+            [index for index, _ in valid], [target_id for target_id, _ in changes], outcomes, errors
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @app.patch("/targets/{target_id}/status")
-async def update_target_status(target_id: int, status_update: StatusUpdate, db: Database = Depends(get_database)):
+async def update_target_status(target_id: int, status_update: StatusUpdate, db: StorageBackend = Depends(get_database)):
     """Update target status"""
     try:
         if target_id <= 0:
@@ -217,12 +493,16 @@ async def update_target_status(target_id: int, status_update: StatusUpdate, db:
         return {"message": "Target status updated successfully"}
     except HTTPException:
         raise
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Note endpoints
 @app.post("/notes", status_code=201)
-async def create_note(note_data: NoteCreate, db: Database = Depends(get_database)):
+async def create_note(note_data: NoteCreate, db: StorageBackend = Depends(get_database)):
     """Create a new note for a target"""
     try:
         note = Note(
@@ -233,22 +513,153 @@ async def create_note(note_data: NoteCreate, db: Database = Depends(get_database
         return {"message": "Note created successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@app.get("/notes", response_model=List[NoteResponse])
-async def get_notes(db: Database = Depends(get_database)):
-    """Get all notes"""
+@app.post("/notes/bulk", response_model=BulkResult)
+async def create_notes_bulk(request: Request, db: StorageBackend = Depends(get_database)):
+    """Create many notes from a JSON array or an NDJSON stream"""
     try:
-        notes = await db.get_notes()
-        return [NoteResponse(
-            id=note['id'],
-            target_id=note['target_id'],
-            message=note['message']
-        ) for note in notes]
+        valid, errors = validate_items(await read_bulk_payload(request), NoteCreate)
+        outcomes = await db.create_notes_bulk([Note(**note_data.model_dump()) for _, note_data in valid])
+        return collect_results([index for index, _ in valid], outcomes, errors)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/notes", response_model=NotePage)
+async def get_notes(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    target_id: Optional[int] = None,
+    since: Optional[datetime] = Query(None, description="Only notes created at or after this time (ISO 8601 with offset)"),
+    db: StorageBackend = Depends(get_database),
+):
+    """Get a page of notes in order of creation, optionally filtered by target and creation time"""
+    try:
+        if since is not None and since.tzinfo is None:
+            raise ValueError("since needs a UTC offset")
+        etag = await check_etag(request, db, ("notes",))
+        notes = await db.get_notes(limit + 1, decode_created_cursor(cursor), target_id=target_id, since=since)
+        notes, next_cursor = paginate_created(notes, limit)
+        return with_etag(page_response(notes, NoteResponse, next_cursor), etag)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/notes/search", response_model=NoteSearchPage)
+async def search_notes(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=255, description='Words to find; "quoted phrases", or and -exclusions work too'),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    target_id: Optional[int] = None,
+    mission_id: Optional[int] = None,
+    cat_id: Optional[int] = None,
+    db: StorageBackend = Depends(get_database),
+):
+    """Search note messages, best matches first, optionally within a target, mission or cat"""
+    try:
+        etag = await check_etag(request, db, ("notes", "missions") if cat_id is not None else ("notes",))
+        notes = await db.search_notes(
+            q, limit + 1, decode_ranked_cursor(cursor), target_id=target_id, mission_id=mission_id, cat_id=cat_id
+        )
+        notes, next_cursor = paginate_ranked(notes, limit)
+        return with_etag(page_response(notes, NoteSearchHit, next_cursor), etag)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolExhaustedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Statistics endpoint
+@app.get("/stats")
+async def get_stats(
+    request: Request,
+    top_cats: int = Query(10, ge=1, le=100, description="How many of the busiest cats to list"),
+    db: StorageBackend = Depends(get_database),
+):
+    """Mission counts by status, targets by country and status, salaries by breed and the busiest cats"""
+    try:
+        etag = await check_etag(request, db, ("cats", "missions", "targets"))
+        return with_etag(ORJSONBytesResponse((await db.get_stats(top_cats)).encode()), etag)
+    except HTTPException:
+        raise
+    except PoolExhaustedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Export endpoint
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+@app.get("/export/{table}")
+async def export_table(
+    table: str,
+    format: str = Query("ndjson", description="ndjson or csv"),
+    since_id: int = Query(0, ge=0, description="Only rows with a greater id, for incremental exports"),
+    db: StorageBackend = Depends(get_database),
+):
+    """Stream a whole table (cats, missions, targets or notes) in id order as NDJSON or CSV"""
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail="Unknown table")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Format must be ndjson or csv")
+    chunks = db.export_table(table, format, since_id)
+    try:
+        # Start the export before answering, so a busy pool still gets a 503 instead of a broken stream.
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    except PoolExhaustedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    async def body():
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            # Hands the connection back even when the client disconnects mid-stream.
+            await chunks.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of request, query, pool and cache metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/pool/stats")
+async def get_pool_stats(db: StorageBackend = Depends(get_database)):
+    """Connection pool saturation: connections in use and idle, waiters and acquire wait times"""
+    return db.pool_stats()
+
+@app.get("/cache/stats")
+async def get_cache_stats(db: StorageBackend = Depends(get_database)):
+    """Hit/miss counters of the cat and mission caches"""
+    return db.cache_stats()
+
 # Root endpoint
 @app.get("/")
 async def read_root():
@@ -0,0 +1,85 @@
+"""Production launcher: WEB_CONCURRENCY uvicorn workers on uvloop and httptools.
+
+Run ``python serve.py``. The schema is created and migrated once here, before any
+worker starts. Each worker caps its pool at its share of DB_CONNECTION_BUDGET.
+On SIGTERM or SIGINT every worker stops accepting connections, ends its event
+streams, waits up to SHUTDOWN_DRAIN_SECONDS for in-flight requests, and only then
+closes its pool.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+import uvicorn
+from uvicorn.main import STARTUP_FAILURE
+from uvicorn.supervisors import Multiprocess
+
+from constants.keys import KEYS
+from services.pool import worker_pool_size
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class Server(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config):
+        super().__init__(config)
+        self._loop = None
+
+    async def startup(self, sockets=None):
+        self._loop = asyncio.get_running_loop()
+        await super().startup(sockets)
+
+    def handle_exit(self, sig, frame):
+        if not self.should_exit and self._loop is not None:
+            # Event streams never finish by themselves and would hold the drain open.
+            # Before startup there are none yet.
+            from main import database
+            self._loop.call_soon_threadsafe(database.events.close)
+        super().handle_exit(sig, frame)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=KEYS["SERVER_HOST"])
+    parser.add_argument("--port", type=int, default=KEYS["SERVER_PORT"])
+    parser.add_argument("--workers", type=int, default=KEYS["WEB_CONCURRENCY"] or os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    if KEYS["STORAGE_BACKEND"] == "memory" and args.workers > 1:
+        # Every worker would hold its own copy of the data.
+        logger.warning("STORAGE_BACKEND=memory runs a single worker")
+        args.workers = 1
+    # Workers import the settings afresh, so they size their pools for this many workers.
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    if KEYS["STORAGE_BACKEND"] == "postgres":
+        if KEYS["DB_CONNECTION_BUDGET"] > 0:
+            try:
+                worker_pool_size(KEYS["DB_CONNECTION_BUDGET"], args.workers)
+            except ValueError as e:
+                parser.error(str(e))
+        from services.db import prepare_schema
+        asyncio.run(prepare_schema())
+
+    config = uvicorn.Config(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        timeout_graceful_shutdown=KEYS["SHUTDOWN_DRAIN_SECONDS"],
+    )
+    server = Server(config)
+    if config.workers > 1:
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+    if not server.started and config.workers == 1:
+        return STARTUP_FAILURE
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from constants.keys import KEYS
+from models.models import Cat, Note, StatusType
+from services.breeds import BreedCatalog
+from services.events import EventBroker
+from utils.schemas import MissionCreate
+
+
+EXPORT_TABLES = ("cats", "missions", "targets", "notes")
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+class NotFoundError(ValueError):
+    pass
+
+
+class StorageBackend(ABC):
+    """Operations the API needs from storage.
+
+    Rows are returned as mappings with the table's columns. Bulk methods return one
+    outcome per input item: the new id or a ValueError. get_mission_tree(s) return
+    missions rendered as JSON text. Validation failures raise ValueError (NotFoundError
+    for missing cats and targets) with the same messages in every backend. Mission and
+    target status changes are published to self.events as they commit.
+    """
+
+    def __init__(self, breed_catalog: BreedCatalog = None):
+        self.breed_catalog = breed_catalog or BreedCatalog()
+        self.events = EventBroker()
+
+    @abstractmethod
+    async def startup(self): ...
+
+    @abstractmethod
+    async def shutdown(self): ...
+
+    @abstractmethod
+    async def create_cat(self, cat: Cat): ...
+
+    @abstractmethod
+    async def create_cats_bulk(self, cats: List[Cat]) -> list: ...
+
+    @abstractmethod
+    async def delete_cat(self, cat_id: int): ...
+
+    @abstractmethod
+    async def update_cat_salary(self, cat_id: int, salary: int): ...
+
+    @abstractmethod
+    async def get_cats(self, limit: int, after_id: int = 0, breed: str = None) -> list: ...
+
+    @abstractmethod
+    async def get_available_cats(self, limit: int, max_active_missions: int) -> list:
+        """Cats with fewer than max_active_missions pending or in-progress missions, as rows with
+        their active_missions: least loaded first, then most experienced, then cheapest."""
+
+    @abstractmethod
+    async def get_cat(self, cat_id: int, min_version: int = None):
+        """The cat, or None. With min_version, read from data at least at that cats table version."""
+
+    @abstractmethod
+    async def create_mission(self, mission: MissionCreate) -> int: ...
+
+    @abstractmethod
+    async def create_missions_bulk(self, missions: List[MissionCreate]) -> list: ...
+
+    @abstractmethod
+    async def delete_mission(self, mission_id: int): ...
+
+    @abstractmethod
+    async def assign_cat_to_mission(self, mission_id: int, cat_id: int): ...
+
+    @abstractmethod
+    async def auto_assign_cat(self, mission_id: int, max_active_missions: int) -> Optional[dict]:
+        """Assign the best ranked available cat (see get_available_cats) to an unassigned mission.
+
+        Returns the cat with its active_missions afterwards, or None if no cat is available.
+        Concurrent calls never wait on each other's candidates nor assign a cat beyond the limit.
+        """
+
+    @abstractmethod
+    async def get_missions(self, limit: int, after_id: int = 0, status: StatusType = None, assigned_cat: int = None) -> list: ...
+
+    @abstractmethod
+    async def get_mission_trees(self, limit: int, after_id: int = 0, status: StatusType = None, assigned_cat: int = None, include_notes: bool = False) -> list: ...
+
+    @abstractmethod
+    async def get_mission(self, mission_id: int, min_version: int = None):
+        """The mission, or None. With min_version, read from data at least at that missions table version."""
+
+    @abstractmethod
+    async def get_mission_tree(self, mission_id: int, include_notes: bool = False) -> Optional[str]: ...
+
+    @abstractmethod
+    async def update_target_status(self, target_id: int, status: StatusType) -> int: ...
+
+    @abstractmethod
+    async def update_target_statuses(self, changes: List[Tuple[int, StatusType]]) -> list:
+        """Apply (target_id, status) changes in one transaction, finishing each mission whose
+        targets all end up finished once. Returns the mission id or a NotFoundError per change."""
+
+    @abstractmethod
+    async def create_note(self, note: Note) -> int: ...
+
+    @abstractmethod
+    async def create_notes_bulk(self, notes: List[Note]) -> list: ...
+
+    @abstractmethod
+    async def get_notes(
+        self, limit: int, after: Tuple[datetime, int] = None, target_id: int = None, since: datetime = None,
+    ) -> list:
+        """Notes in order of creation (created_at, then id), after the (created_at, id) of the
+        last row of the previous page and created at or after since."""
+
+    @abstractmethod
+    async def search_notes(
+        self, query: str, limit: int, after: Tuple[float, int] = None,
+        target_id: int = None, mission_id: int = None, cat_id: int = None,
+    ) -> list:
+        """Notes matching a web-search style query, best first, as rows with a rank.
+
+        after is the (rank, id) of the last row of the previous page.
+        """
+
+    @abstractmethod
+    async def get_stats(self, top_cats: int = 10) -> str:
+        """Agency statistics as a JSON document, with the top_cats cats that have the most active missions."""
+
+    @abstractmethod
+    async def get_mission_events(self, after_id: int, mission_ids: List[int] = None, limit: int = 500) -> list: ...
+
+    @abstractmethod
+    def export_table(self, table: str, fmt: str = "ndjson", since_id: int = 0) -> AsyncIterator[bytes]:
+        """Yield every row of table with id > since_id, in id order, as NDJSON or CSV (with a header) chunks."""
+
+    @abstractmethod
+    async def table_versions(self, tables: Sequence[str]) -> Dict[str, int]:
+        """Current change version of each table; any committed write to a table increases it."""
+
+    @abstractmethod
+    async def claim_idempotency_key(self, key: str, fingerprint: str, lock_seconds: float) -> Optional[dict]:
+        """Reserve key for lock_seconds for the request with this fingerprint.
+
+        Returns None if the caller got it. Otherwise returns the live entry: its
+        fingerprint, plus status, headers and body once the first request has saved
+        its response (status is None while it is still running).
+        """
+
+    @abstractmethod
+    async def save_idempotent_response(self, key: str, status: int, headers: List[List[str]], body: bytes, ttl: float):
+        """Store the response of the request holding key, to be replayed for ttl seconds."""
+
+    @abstractmethod
+    async def release_idempotency_key(self, key: str):
+        """Drop a key whose request failed without a response worth replaying."""
+
+    def pool_stats(self) -> dict:
+        return {}
+
+    def cache_stats(self) -> dict:
+        return {}
+
+
+def create_database(breed_catalog: BreedCatalog = None) -> StorageBackend:
+    """Build the backend selected by STORAGE_BACKEND ("postgres" or "memory")."""
+    backend = KEYS["STORAGE_BACKEND"]
+    if backend == "postgres":
+        from services.db import Database
+        return Database(breed_catalog)
+    if backend == "memory":
+        from services.memory import MemoryDatabase
+        return MemoryDatabase(breed_catalog)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+import httpx
+
+from constants.keys import KEYS
+from services.metrics import BREED_FETCHES
+
+logger = logging.getLogger(__name__)
+
+BreedFetcher = Callable[[], Awaitable[Iterable[str]]]
+
+# Minimum delay between two upstream attempts when the catalog is empty or
+# the last refresh failed, so a TheCatAPI outage is not hammered per request.
+RETRY_INTERVAL_SECONDS = 30.0
+
+
+async def fetch_breeds_from_thecatapi() -> Iterable[str]:
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        response = await client.get(KEYS["BREEDS_API_URL"])
+        response.raise_for_status()
+        return [breed["name"] for breed in response.json()]
+
+
+def normalize_breed(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+class BreedCatalog:
+    """In-memory set of valid breeds, refreshed in the background and persisted to a snapshot file."""
+
+    def __init__(
+        self,
+        fetcher: Optional[BreedFetcher] = None,
+        ttl: float = KEYS["BREEDS_TTL_SECONDS"],
+        snapshot_path: Optional[str] = KEYS["BREEDS_SNAPSHOT_PATH"],
+    ):
+        self.fetcher = fetcher or fetch_breeds_from_thecatapi
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self._breeds: Dict[str, str] = {}
+        self._loaded_at = 0.0
+        self._last_attempt = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._load_snapshot()
+        if not self._breeds or self._is_stale():
+            await self.refresh()
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def lookup(self, breed: str) -> Optional[str]:
+        """Return the canonical breed name, or None if the breed is unknown."""
+        if not self._breeds and time.monotonic() - self._last_attempt >= RETRY_INTERVAL_SECONDS:
+            await self.refresh()
+        return self._breeds.get(normalize_breed(breed))
+
+    async def refresh(self) -> bool:
+        async with self._lock:
+            self._last_attempt = time.monotonic()
+            try:
+                names = list(await self.fetcher())
+            except Exception as e:
+                BREED_FETCHES.inc("failure")
+                logger.warning("Could not refresh breed catalog: %s", e)
+                return False
+            BREED_FETCHES.inc("success")
+            if not names:
+                logger.warning("Breed fetcher returned no breeds, keeping current catalog")
+                return False
+            self._set_breeds(names, time.time())
+            self._save_snapshot(names)
+            return True
+
+    def _set_breeds(self, names: Iterable[str], loaded_at: float):
+        self._breeds = {normalize_breed(name): name for name in names}
+        self._loaded_at = loaded_at
+
+    def _is_stale(self) -> bool:
+        return time.time() - self._loaded_at >= self.ttl
+
+    async def _refresh_loop(self):
+        while True:
+            if self._breeds:
+                delay = max(self._loaded_at + self.ttl - time.time(), RETRY_INTERVAL_SECONDS)
+            else:
+                delay = RETRY_INTERVAL_SECONDS
+            await asyncio.sleep(delay)
+            await self.refresh()
+
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self._set_breeds(snapshot["breeds"], snapshot["fetched_at"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable breed snapshot %s: %s", self.snapshot_path, e)
+
+    def _save_snapshot(self, names: Iterable[str]):
+        if not self.snapshot_path:
+            return
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": self._loaded_at, "breeds": sorted(names)}, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning("Could not write breed snapshot %s: %s", self.snapshot_path, e)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class EntityCache:
+    """LRU cache with a TTL per entry and single-flight loading of missing keys.
+
+    Each entry keeps the version of the data it was read from (a table_versions value),
+    so readers holding a newer version can skip entries other workers' writes outdated.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Tuple[Any, int]]], min_version: int = None) -> Any:
+        """The value for key, loading it if missing. loader returns the value with the version
+        of the data it was read from; with min_version, a value read at an older version (cached
+        or still loading) is loaded again, so it is never older than what the caller has seen."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, version, value = entry
+            if expires_at > time.monotonic() and (min_version is None or version >= min_version):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        while True:
+            task = self._inflight.get(key)
+            if task is None:
+                self.misses += 1
+                # The load runs in its own task so a cancelled caller does not cancel it for the others.
+                task = asyncio.ensure_future(self._load(key, loader))
+                self._inflight[key] = task
+                own = True
+            else:
+                self.coalesced += 1
+                own = False
+            value, version = await asyncio.shield(task)
+            if own or value is None or min_version is None or version >= min_version:
+                return value
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Tuple[Any, int]]]) -> Tuple[Any, int]:
+        current = asyncio.current_task()
+        try:
+            value, version = await loader()
+            # An invalidation while loading unregisters this task; its result may be stale then.
+            if value is not None and self._inflight.get(key) is current:
+                self._store(key, value, version)
+            return value, version
+        finally:
+            if self._inflight.get(key) is current:
+                del self._inflight[key]
+
+    def _store(self, key: Hashable, value: Any, version: int):
+        self._entries[key] = (time.monotonic() + self.ttl, version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self.invalidations += 1
+        self._entries.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+        }
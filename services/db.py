@@ -1,222 +1,656 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
 from enum import Enum
 from re import A
 from pydantic import BaseModel, Field
 import asyncpg
+import orjson
 from models.models import Cat, Mission, Target, Note, StatusType
 from utils.schemas import MissionCreate, TargetCreate, NoteCreate, CatCreate, CatAssignment, SalaryUpdate, StatusUpdate
+from typing import Dict, List, Sequence, Tuple
 from constants.keys import KEYS
-import httpx
+from services.backend import NotFoundError, StorageBackend
+from services.breeds import BreedCatalog
+from services.migrations import migrate
+from services.cache import EntityCache
+from services.events import EventCursor
+from services.group_commit import GroupCommitBuffer
+from services.notifications import NotificationListener
+from services.pool import MeteredPool
+from services.replicas import REPLICA_DOWN_ERRORS, REPLICA_RETRY_ERRORS, ReplicaSet
+from services.queries import EXPORT_COLUMNS, MISSION_COLUMNS, QueryRegistry, mission_tree_sql
+from services.metrics import instrumented
 
+logger = logging.getLogger(__name__)
 
-class Database:
-    def __init__(self):
+INVALIDATION_CHANNEL = "entity_invalidation"
+# COPY output chunks buffered between Postgres and a slow export client.
+EXPORT_QUEUE_CHUNKS = 16
+_EXPORT_END = object()
+MISSION_EVENTS_CHANNEL = "mission_events"
+# Seconds between purging expired idempotency keys and mission events and creating
+# upcoming notes partitions.
+MAINTENANCE_INTERVAL = 60
+# Mission events deleted per statement, so a large backlog does not hold one long transaction.
+EVENTS_PURGE_BATCH = 5000
+# Before any note; the lower bound of the first page.
+NOTES_START = datetime(1, 1, 1, tzinfo=timezone.utc)
+
+
+async def _create_database():
+    conn = await asyncpg.connect(KEYS["DEFAULT_DB_URL"])
+    try:
+        await conn.execute(f'CREATE DATABASE "{KEYS["TARGET_DB"]}";')
+    except asyncpg.DuplicateDatabaseError:
+        pass
+    finally:
+        await conn.close()
+
+
+async def prepare_schema():
+    """Create the database if needed, migrate it and create the upcoming notes partitions.
+
+    serve.py runs this once before starting its workers, whose startup then finds the
+    schema current with a single query.
+    """
+    try:
+        pool = await asyncpg.create_pool(KEYS["DATABASE_URL"], min_size=1, max_size=1)
+    except asyncpg.InvalidCatalogNameError:
+        await _create_database()
+        pool = await asyncpg.create_pool(KEYS["DATABASE_URL"], min_size=1, max_size=1)
+    try:
+        await migrate(pool)
+        await pool.fetchval("SELECT create_notes_partitions($1)", KEYS["NOTES_PARTITIONS_AHEAD"])
+    finally:
+        await pool.close()
+
+
+class Database(StorageBackend):
+    def __init__(self, breed_catalog: BreedCatalog = None):
+        super().__init__(breed_catalog)
         self.pool = None
+        self.replicas = None
+        self.queries = QueryRegistry()
+        self.caches = {
+            "cat": EntityCache(KEYS["CACHE_MAX_ENTRIES"], KEYS["CACHE_TTL_SECONDS"]),
+            "mission": EntityCache(KEYS["CACHE_MAX_ENTRIES"], KEYS["CACHE_TTL_SECONDS"]),
+        }
+        self.listener = None
+        self.note_buffer = None
+        self._stats_task = None
+        self._maintenance_task = None
 
     async def startup(self):
-        await self._ensure_database_exists()
-        self.pool = await asyncpg.create_pool(KEYS["DATABASE_URL"])
+        try:
+            self.pool = await MeteredPool.create(KEYS["DATABASE_URL"], init=self.queries.init_connection)
+        except asyncpg.InvalidCatalogNameError:
+            await _create_database()
+            self.pool = await MeteredPool.create(KEYS["DATABASE_URL"], init=self.queries.init_connection)
         await self._create_tables()
+        if KEYS["DB_REPLICA_URLS"]:
+            self.replicas = ReplicaSet(self.pool, KEYS["DB_REPLICA_URLS"])
+            await self.replicas.start(init=self.queries.init_connection)
+        await self.breed_catalog.start()
+        self.events.position = EventCursor(await self.pool.fetchval("SELECT coalesce(max(id), 0) FROM mission_events"))
+        self.listener = NotificationListener(KEYS["DATABASE_URL"])
+        self.listener.subscribe(MISSION_EVENTS_CHANNEL, self._on_mission_event)
+        self.listener.on_reconnect(self._replay_mission_events)
+        if KEYS["CACHE_NOTIFY"]:
+            self.listener.subscribe(INVALIDATION_CHANNEL, self._on_invalidation)
+            self.listener.on_reconnect(self._clear_caches)
+        await self.listener.start()
+        if KEYS["NOTES_GROUP_COMMIT"]:
+            self.note_buffer = GroupCommitBuffer(
+                "notes", self._write_note_batch,
+                KEYS["NOTES_GROUP_COMMIT_MAX_BATCH"], KEYS["NOTES_GROUP_COMMIT_MAX_DELAY_MS"] / 1000,
+            )
+            await self.note_buffer.start()
+        if KEYS["STATS_COMPACT_INTERVAL"] > 0:
+            self._stats_task = asyncio.create_task(self._compact_stats_loop())
+        self._maintenance_task = asyncio.create_task(self._maintenance_loop())
 
     async def shutdown(self):
+        for task in (self._stats_task, self._maintenance_task):
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._stats_task = self._maintenance_task = None
+        if self.note_buffer:
+            await self.note_buffer.stop()
+        if self.listener:
+            await self.listener.stop()
+        await self.breed_catalog.stop()
+        if self.replicas:
+            await self.replicas.stop()
         await self.pool.close()
 
-    async def _ensure_database_exists(self):
-        try:
-            conn = await asyncpg.connect(KEYS["DATABASE_URL"])
-            await conn.close()
-        except asyncpg.InvalidCatalogNameError:
-            conn = await asyncpg.connect(KEYS["DEFAULT_DB_URL"])
-            await conn.execute(f'CREATE DATABASE "{KEYS['TARGET_DB']}";')
-            await conn.close()
-    
-    async def _create_tables(self):
-        await self._create_status_type()
-        await self._create_cat_table()
-        await self._create_mission_table()
-        await self._create_target_table()
-        await self._create_note_table()
+    async def _invalidate(self, kind: str, entity_id: int):
+        self.caches[kind].invalidate(entity_id)
+        if KEYS["CACHE_NOTIFY"]:
+            await self.pool.execute("SELECT pg_notify($1, $2)", INVALIDATION_CHANNEL, f"{kind}:{entity_id}")
 
-    async def _create_status_type(self):
-        query = """
-        DO $$
-        BEGIN
-            IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'status_type') THEN
-                CREATE TYPE status_type AS ENUM ('pending', 'in_progress', 'finished', 'cancelled');
-            END IF;
-        END
-        $$;
-        """
-        async with self.pool.acquire() as connection:
-            await connection.execute(query)
-    
-    async def _create_cat_table(self):
-        query = """
-        CREATE TABLE IF NOT EXISTS cats (id SERIAL PRIMARY KEY, name VARCHAR(255) NOT NULL, years_of_experience INT NOT NULL, breed VARCHAR(255) NOT NULL, salary INT NOT NULL)
-        """
-        async with self.pool.acquire() as connection:
-            await connection.execute(query)
+    def _on_invalidation(self, payload: str):
+        kind, _, entity_id = payload.partition(":")
+        if kind in self.caches and entity_id.isdigit():
+            self.caches[kind].invalidate(int(entity_id))
 
-    async def _create_mission_table(self):
-        query = """
-        CREATE TABLE IF NOT EXISTS missions (id SERIAL PRIMARY KEY, assigned_cat INT NULL, status status_type NOT NULL, title VARCHAR(255) NOT NULL, FOREIGN KEY (assigned_cat) REFERENCES cats(id))
-        """
-        async with self.pool.acquire() as connection:
-            await connection.execute(query)
-    
-    async def _create_target_table(self):
-        query = """
-        CREATE TABLE IF NOT EXISTS targets (id SERIAL PRIMARY KEY, assigned_mission INT NOT NULL, status status_type NOT NULL, name VARCHAR(255) NOT NULL, country VARCHAR(255) NOT NULL, FOREIGN KEY (assigned_mission) REFERENCES missions(id))
-        """
-        async with self.pool.acquire() as connection:
-            await connection.execute(query)
+    def _on_mission_event(self, payload: str):
+        self.events.publish(orjson.loads(payload))
 
-    async def _create_note_table(self):
-        query = """
-        CREATE TABLE IF NOT EXISTS notes (id SERIAL PRIMARY KEY, target_id INT NOT NULL, message VARCHAR(255) NOT NULL, FOREIGN KEY (target_id) REFERENCES targets(id))
+    async def _replay_mission_events(self):
+        """Publish the events committed while the LISTEN connection was down.
+
+        The replay starts below the oldest gap: a transaction that took its event ids
+        earlier may have committed them meanwhile.
         """
-        async with self.pool.acquire() as connection:
-            await connection.execute(query)
+        after_id = self.events.position.floor
+        while True:
+            events = await self.get_mission_events(after_id)
+            for event in events:
+                if not self.events.position.seen(event["id"]):
+                    self.events.publish(event)
+            if not events:
+                break
+            after_id = events[-1]["id"]
+
+    async def _clear_caches(self):
+        for cache in self.caches.values():
+            cache.clear()
+
+    async def _compact_stats_loop(self):
+        """Fold the statistics delta rows written by the triggers, so GET /stats sums few rows."""
+        while True:
+            await asyncio.sleep(KEYS["STATS_COMPACT_INTERVAL"])
+            try:
+                await self._fetchval("compact_stats")
+            except Exception as e:
+                logger.warning("Could not compact statistics: %s", e)
 
+    async def _maintenance_loop(self):
+        while True:
+            await asyncio.sleep(MAINTENANCE_INTERVAL)
+            try:
+                await self._fetchval("purge_idempotency_keys")
+            except Exception as e:
+                logger.warning("Could not purge idempotency keys: %s", e)
+            try:
+                await self._fetchval("create_notes_partitions", KEYS["NOTES_PARTITIONS_AHEAD"])
+            except Exception as e:
+                logger.warning("Could not create notes partitions: %s", e)
+            if KEYS["MISSION_EVENTS_RETENTION_HOURS"] > 0:
+                try:
+                    await self.purge_mission_events(KEYS["MISSION_EVENTS_RETENTION_HOURS"] * 3600)
+                except Exception as e:
+                    logger.warning("Could not purge mission events: %s", e)
+
+    async def purge_mission_events(self, max_age_seconds: float) -> int:
+        """Delete mission events older than max_age_seconds; returns how many."""
+        purged = 0
+        while True:
+            deleted = await self._fetchval("purge_mission_events", max_age_seconds, EVENTS_PURGE_BATCH)
+            purged += deleted
+            if deleted < EVENTS_PURGE_BATCH:
+                return purged
+
+    def pool_stats(self):
+        if not self.pool:
+            return {}
+        stats = self.pool.stats()
+        if self.replicas:
+            stats["replicas"] = self.replicas.stats()
+        return stats
+
+    def cache_stats(self):
+        return {kind: cache.stats() for kind, cache in self.caches.items()}
+
+    async def _create_tables(self):
+        if await migrate(self.pool):
+            # Connections opened before the schema existed have no status codec or prepared statements.
+            await self.pool.expire_connections()
+        await self._fetchval("create_notes_partitions", KEYS["NOTES_PARTITIONS_AHEAD"])
+
+    async def _fetch(self, name: str, *args):
+        async with self.pool.acquire() as conn:
+            return await self.queries.fetch(conn, name, *args)
+
+    async def _fetchrow(self, name: str, *args):
+        async with self.pool.acquire() as conn:
+            return await self.queries.fetchrow(conn, name, *args)
+
+    async def _fetch_versioned(self, name: str, *args):
+        row = await self._fetchrow(name, *args)
+        return row, row["version"] if row else None
+
+    async def _fetchval(self, name: str, *args):
+        async with self.pool.acquire() as conn:
+            return await self.queries.fetchval(conn, name, *args)
+
+    def _read_pool(self) -> MeteredPool:
+        return self.replicas.read_pool() if self.replicas else self.pool
+
+    async def _read(self, run):
+        """Await run(conn) on the server picked for this request's reads, retrying on the primary if a replica fails."""
+        pool = self._read_pool()
+        if pool is not self.pool:
+            try:
+                async with pool.acquire() as conn:
+                    return await run(conn)
+            except REPLICA_DOWN_ERRORS + REPLICA_RETRY_ERRORS as e:
+                self.replicas.failed(pool, e)
+        async with self.pool.acquire() as conn:
+            return await run(conn)
+
+    async def _read_fetch(self, name: str, *args):
+        return await self._read(lambda conn: self.queries.fetch(conn, name, *args))
+
+    async def _read_fetchval(self, name: str, *args):
+        return await self._read(lambda conn: self.queries.fetchval(conn, name, *args))
+
+    @instrumented
     async def create_cat(self, cat: Cat):
-        cat.breed = cat.breed.title()
-        if not await self._validate_breed(cat.breed):
+        breed = await self.breed_catalog.lookup(cat.breed)
+        if breed is None:
             raise ValueError("Invalid breed")
-        query = "INSERT INTO cats (name, years_of_experience, breed, salary) VALUES ($1, $2, $3, $4) RETURNING id, name, years_of_experience, breed, salary"
-        return await self.pool.fetchrow(query, cat.name, cat.years_of_experience, cat.breed, cat.salary)
+        cat.breed = breed
+        return await self._fetchrow("insert_cat", cat.name, cat.years_of_experience, cat.breed, cat.salary)
 
+    @instrumented
     async def delete_cat(self, cat_id: int):
-        cat_in_mission = await self.pool.fetchrow("SELECT * FROM missions WHERE assigned_cat = $1", cat_id)
-        if cat_in_mission:
+        try:
+            result = await self._fetchrow("delete_cat", cat_id)
+        except asyncpg.ForeignKeyViolationError:
+            raise ValueError("Cat is assigned to a mission")
+        if result["assigned"]:
             raise ValueError("Cat is assigned to a mission")
-        result = await self.pool.execute("DELETE FROM cats WHERE id = $1", cat_id)
-        deleted_count = int(result.split()[-1])
-        if deleted_count == 0:
+        if not result["deleted"]:
             raise ValueError("Cat not found")
+        await self._invalidate("cat", cat_id)
     
+    @instrumented
     async def update_cat_salary(self, cat_id: int, salary: int):
-        await self.pool.execute("UPDATE cats SET salary = $1 WHERE id = $2", salary, cat_id)
+        updated = await self._fetchval("update_cat_salary", salary, cat_id)
+        if updated is None:
+            raise NotFoundError("Cat not found")
+        await self._invalidate("cat", cat_id)
     
-    async def _validate_breed(self, breed: str): 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"https://api.thecatapi.com/v1/breeds/search?q={breed}")
-            if response.status_code == 200:
-                results = response.json()
-                for result in results:
-                    if result["name"] == breed:
-                        return True
-            return False
-
+    @instrumented
     async def create_mission(self, mission: MissionCreate):
         targets = mission.targets
         if len(targets) == 0:
             raise ValueError("No targets provided")
         if len(targets) > 3:
             raise ValueError("Too many targets provided")
+        try:
+            return await self._insert_mission(mission)
+        except asyncpg.ForeignKeyViolationError:
+            raise ValueError("Assigned cat does not exist")
+
+    async def _insert_mission(self, mission: MissionCreate):
         async with self.pool.acquire() as conn:
             async with conn.transaction():
-                query_mission = """
-                    INSERT INTO missions (assigned_cat, status, title)
-                    VALUES ($1, $2, $3)
-                    RETURNING id
-                """
-                mission_id_row = await conn.fetchrow(
-                    query_mission,
-                    mission.assigned_cat,
-                    mission.status.value if hasattr(mission.status, "value") else mission.status,
-                    mission.title,
+                mission_id = await self.queries.fetchval(
+                    conn, "insert_mission", mission.assigned_cat, mission.status, mission.title
                 )
-                mission_id = mission_id_row["id"]
-
-                query_target = """
-                    INSERT INTO targets (assigned_mission, status, name, country)
-                    VALUES ($1, $2, $3, $4)
-                """
-                for target in targets:
-                    await conn.execute(
-                        query_target,
-                        mission_id,
-                        target.status.value if hasattr(target.status, "value") else target.status,
-                        target.name,
-                        target.country,
-                    )
+                await self._insert_targets(conn, [
+                    (mission_id, target.status, target.name, target.country) for target in mission.targets
+                ])
         return mission_id
+
+    async def _insert_targets(self, conn, records):
+        await conn.copy_records_to_table(
+            "targets", records=records, columns=["assigned_mission", "status", "name", "country"]
+        )
+
+    async def _reserve_ids(self, conn, table: str, count: int):
+        return [row[0] for row in await self.queries.fetch(conn, "reserve_ids", table, count)]
+
+    async def _run_bulk_chunks(self, rows, insert_chunk):
+        """Run insert_chunk(conn, chunk) per chunk in its own transaction, returning one outcome per row."""
+        outcomes = []
+        chunk_size = KEYS["BULK_CHUNK_SIZE"]
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        outcomes.extend(await insert_chunk(conn, chunk))
+            except asyncpg.PostgresError as e:
+                outcomes.extend(ValueError(f"Batch insert failed: {e}") for _ in chunk)
+        return outcomes
+
+    @instrumented
+    async def create_cats_bulk(self, cats: List[Cat]):
+        """Insert many cats, returning the new id or a ValueError for each input cat."""
+        outcomes, rows = [None] * len(cats), []
+        for index, cat in enumerate(cats):
+            breed = await self.breed_catalog.lookup(cat.breed)
+            if breed is None:
+                outcomes[index] = ValueError("Invalid breed")
+            else:
+                rows.append((index, cat.name, cat.years_of_experience, breed, cat.salary))
+
+        async def insert_chunk(conn, chunk):
+            ids = await self._reserve_ids(conn, "cats", len(chunk))
+            await conn.copy_records_to_table(
+                "cats",
+                records=[(cat_id, *row[1:]) for cat_id, row in zip(ids, chunk)],
+                columns=["id", "name", "years_of_experience", "breed", "salary"],
+            )
+            return ids
+
+        for row, outcome in zip(rows, await self._run_bulk_chunks(rows, insert_chunk)):
+            outcomes[row[0]] = outcome
+        return outcomes
+
+    @instrumented
+    async def create_missions_bulk(self, missions: List[MissionCreate]):
+        """Insert many missions with their targets, returning the new id or a ValueError per mission."""
+
+        async def insert_chunk(conn, chunk):
+            cat_ids = list({mission.assigned_cat for mission in chunk if mission.assigned_cat is not None})
+            existing_cats = {
+                row["id"] for row in await conn.fetch("SELECT id FROM cats WHERE id = ANY($1::int[]) FOR KEY SHARE", cat_ids)
+            } if cat_ids else set()
+            valid = [mission.assigned_cat is None or mission.assigned_cat in existing_cats for mission in chunk]
+            ids = iter(await self._reserve_ids(conn, "missions", sum(valid)))
+            mission_records, target_records, outcomes = [], [], []
+            for mission, is_valid in zip(chunk, valid):
+                if not is_valid:
+                    outcomes.append(ValueError("Assigned cat does not exist"))
+                    continue
+                mission_id = next(ids)
+                mission_records.append((mission_id, mission.assigned_cat, mission.status, mission.title))
+                target_records.extend(
+                    (mission_id, target.status, target.name, target.country) for target in mission.targets
+                )
+                outcomes.append(mission_id)
+            if mission_records:
+                await conn.copy_records_to_table(
+                    "missions", records=mission_records, columns=["id", "assigned_cat", "status", "title"]
+                )
+                await self._insert_targets(conn, target_records)
+            return outcomes
+
+        return await self._run_bulk_chunks(missions, insert_chunk)
     
+    @instrumented
     async def delete_mission(self, mission_id: int):
-        mission = await self.pool.fetchrow(
-            "SELECT assigned_cat FROM missions WHERE id = $1", mission_id
-        )
-        if not mission:
+        result = await self._fetchrow("delete_mission", mission_id)
+        if not result["found"]:
             raise ValueError("Mission does not exist")
-        
-        if mission["assigned_cat"] is not None:
+        if result["assigned_cat"] is not None:
             raise ValueError("Mission is assigned to a cat, cannot be deleted")
-        
-        target_count = await self.pool.fetchval(
-            "SELECT COUNT(*) FROM targets WHERE assigned_mission = $1", mission_id
-        )
-        if target_count > 0:
-            await self.pool.execute(
-                "UPDATE targets SET status = $1 WHERE assigned_mission = $2",
-                StatusType.CANCELLED.value, mission_id
-            )
-
-        await self.pool.execute(
-            "UPDATE missions SET status = $1 WHERE id = $2",
-            StatusType.CANCELLED.value, mission_id
-        )
+        await self._invalidate("mission", mission_id)
     
+    @instrumented
     async def assign_cat_to_mission(self, mission_id: int, cat_id: int):
-        mission = await self.pool.fetchrow(
-            "SELECT assigned_cat FROM missions WHERE id = $1", mission_id
-        )
-        if not mission:
+        try:
+            result = await self._fetchrow("assign_cat_to_mission", mission_id, cat_id)
+        except asyncpg.ForeignKeyViolationError:
+            raise NotFoundError("Cat not found")
+        if not result["cat_exists"]:
+            raise NotFoundError("Cat not found")
+        if not result["mission_exists"]:
             raise ValueError("Mission does not exist")
-        if mission["assigned_cat"] is not None:
+        if not result["assigned"]:
+            raise ValueError("Mission is already assigned to a cat")
+        await self._invalidate("mission", mission_id)
+
+    @instrumented
+    async def auto_assign_cat(self, mission_id: int, max_active_missions: int):
+        result = await self._fetchrow("auto_assign_cat", mission_id, max_active_missions)
+        if not result["mission_exists"]:
+            raise NotFoundError("Mission not found")
+        if result["current_cat"] is not None:
             raise ValueError("Mission is already assigned to a cat")
-        await self.pool.execute("UPDATE missions SET assigned_cat = $1 WHERE id = $2", cat_id, mission_id)
+        if result["id"] is None:
+            return None
+        await self._invalidate("mission", mission_id)
+        return result
 
+    @instrumented
     async def create_note(self, note: Note):
-        target = await self.pool.fetchrow("SELECT * FROM targets WHERE id = $1", note.target_id)
-        if not target:
+        if self.note_buffer:
+            return await self.note_buffer.submit(note)
+        return await self._insert_note(note)
+
+    async def _insert_note(self, note: Note):
+        result = await self._fetchrow("insert_note", note.target_id, note.message)
+        if result["target_status"] is None:
             raise ValueError("Target does not exist")
-        if target["status"] == StatusType.FINISHED.value or target["status"] == StatusType.CANCELLED.value:
+        if result["note_id"] is None:
             raise ValueError("Target is finished or cancelled")
-        query = """
-        INSERT INTO notes (target_id, message)
-        VALUES ($1, $2)
-        """
-        await self.pool.execute(query, note.target_id, note.message)        
-    
-    async def get_cats(self):
-        query = "SELECT * FROM cats"
-        return await self.pool.fetch(query)
+        return result["note_id"]
     
-    async def get_cat(self, cat_id: int):
-        query = "SELECT * FROM cats WHERE id = $1"
-        return await self.pool.fetchrow(query, cat_id)
-    
-    async def get_missions(self):
-        query = "SELECT * FROM missions"
-        return await self.pool.fetch(query)
-    
-    async def get_mission(self, mission_id: int):
-        query = "SELECT * FROM missions WHERE id = $1"
-        return await self.pool.fetchrow(query, mission_id)
-    
-    async def get_notes(self):
-        query = "SELECT * FROM notes"
-        return await self.pool.fetch(query)
+    async def _insert_notes(self, conn, notes: List[Note]):
+        """Insert notes on open targets with one status query and one COPY, returning the id or a ValueError per note."""
+        target_ids = list({note.target_id for note in notes})
+        statuses = {
+            row["id"]: row["status"]
+            for row in await self.queries.fetch(conn, "target_statuses_for_share", target_ids)
+        }
+        closed = (None, StatusType.FINISHED, StatusType.CANCELLED)
+        writable = sum(statuses.get(note.target_id) not in closed for note in notes)
+        ids = iter(await self._reserve_ids(conn, "notes", writable))
+        records, outcomes = [], []
+        for note in notes:
+            status = statuses.get(note.target_id)
+            if status is None:
+                outcomes.append(ValueError("Target does not exist"))
+            elif status in (StatusType.FINISHED, StatusType.CANCELLED):
+                outcomes.append(ValueError("Target is finished or cancelled"))
+            else:
+                note_id = next(ids)
+                records.append((note_id, note.target_id, note.message))
+                outcomes.append(note_id)
+        if records:
+            await conn.copy_records_to_table("notes", records=records, columns=["id", "target_id", "message"])
+        return outcomes
+
+    async def _write_note_batch(self, notes: List[Note]):
+        """Group commit: write the notes buffered from concurrent create_note calls in one transaction."""
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    return await self._insert_notes(conn, notes)
+        except asyncpg.PostgresError:
+            # Retry one by one so a single bad note does not fail everyone else's request.
+            outcomes = []
+            for note in notes:
+                try:
+                    outcomes.append(await self._insert_note(note))
+                except (ValueError, asyncpg.PostgresError) as e:
+                    outcomes.append(e)
+            return outcomes
+
+    @instrumented
+    async def create_notes_bulk(self, notes: List[Note]):
+        """Insert many notes, returning the new id or a ValueError per note."""
+        return await self._run_bulk_chunks(notes, self._insert_notes)
+
+    @instrumented
+    async def get_cats(self, limit: int, after_id: int = 0, breed: str = None):
+        if breed is None:
+            return await self._read_fetch("list_cats", after_id, limit)
+        breed = await self.breed_catalog.lookup(breed) or breed
+        return await self._read_fetch("list_cats_by_breed", after_id, breed, limit)
+
+    @instrumented
+    async def get_available_cats(self, limit: int, max_active_missions: int):
+        return await self._read_fetch("available_cats", max_active_missions, limit)
+
+    @instrumented
+    async def get_cat(self, cat_id: int, min_version: int = None):
+        # Cache misses (here and in get_mission) read the primary: a lagging replica would
+        # pin a stale row in the cache for its whole TTL.
+        return await self.caches["cat"].get_or_load(cat_id, lambda: self._fetch_versioned("get_cat", cat_id), min_version)
     
+    def _mission_filters(self, after_id: int, status: StatusType = None, assigned_cat: int = None):
+        conditions, args = ["m.id > $1"], [after_id]
+        if status is not None:
+            args.append(status)
+            conditions.append(f"m.status = ${len(args)}")
+        if assigned_cat is not None:
+            args.append(assigned_cat)
+            conditions.append(f"m.assigned_cat = ${len(args)}")
+        return conditions, args
+
+    @instrumented
+    async def get_missions(self, limit: int, after_id: int = 0, status: StatusType = None, assigned_cat: int = None):
+        conditions, args = self._mission_filters(after_id, status, assigned_cat)
+        args.append(limit)
+        query = f"SELECT {MISSION_COLUMNS} FROM missions m WHERE {' AND '.join(conditions)} ORDER BY m.id LIMIT ${len(args)}"
+        return await self._read(lambda conn: conn.fetch(query, *args))
+
+    @instrumented
+    async def get_mission_trees(self, limit: int, after_id: int = 0, status: StatusType = None, assigned_cat: int = None, include_notes: bool = False):
+        """Like get_missions, but each row carries the mission with its targets (and notes) as a JSON document."""
+        conditions, args = self._mission_filters(after_id, status, assigned_cat)
+        args.append(limit)
+        query = f"""
+        SELECT m.id, {mission_tree_sql(include_notes)} AS document
+        FROM missions m WHERE {' AND '.join(conditions)} ORDER BY m.id LIMIT ${len(args)}
+        """
+        return await self._read(lambda conn: conn.fetch(query, *args))
+
+    @instrumented
+    async def get_mission(self, mission_id: int, min_version: int = None):
+        return await self.caches["mission"].get_or_load(mission_id, lambda: self._fetch_versioned("get_mission", mission_id), min_version)
+
+    @instrumented
+    async def get_mission_tree(self, mission_id: int, include_notes: bool = False):
+        """Return the mission with its targets (and notes) as a JSON document, or None."""
+        return await self._read_fetchval("get_mission_tree_with_notes" if include_notes else "get_mission_tree", mission_id)
+
+    @instrumented
+    async def get_notes(self, limit: int, after: Tuple[datetime, int] = None, target_id: int = None, since: datetime = None):
+        after_created, after_id = after or (NOTES_START, 0)
+        lower = max(after_created, since or NOTES_START)
+        if target_id is None:
+            return await self._read_fetch("list_notes", lower, after_created, after_id, limit)
+        return await self._read_fetch("list_notes_by_target", lower, after_created, after_id, target_id, limit)
+
+    @instrumented
+    async def search_notes(
+        self, query: str, limit: int, after: Tuple[float, int] = None,
+        target_id: int = None, mission_id: int = None, cat_id: int = None,
+    ):
+        conditions, args = ["n.search @@ q"], [query]
+        if target_id is not None:
+            args.append(target_id)
+            conditions.append(f"n.target_id = ${len(args)}")
+        if mission_id is not None:
+            args.append(mission_id)
+            conditions.append(f"n.target_id IN (SELECT id FROM targets WHERE assigned_mission = ${len(args)})")
+        if cat_id is not None:
+            args.append(cat_id)
+            conditions.append(
+                f"n.target_id IN (SELECT t.id FROM targets t JOIN missions m ON m.id = t.assigned_mission WHERE m.assigned_cat = ${len(args)})"
+            )
+        if after is not None:
+            args.extend(after)
+            conditions.append(f"(ts_rank(n.search, q), n.id) < (${len(args) - 1}::real, ${len(args)})")
+        args.append(limit)
+        sql = f"""
+        SELECT n.id, n.target_id, n.message, n.created_at, ts_rank(n.search, q) AS rank
+        FROM notes n, websearch_to_tsquery('english', $1) q
+        WHERE {' AND '.join(conditions)}
+        ORDER BY rank DESC, n.id DESC LIMIT ${len(args)}
+        """
+        return await self._read(lambda conn: conn.fetch(sql, *args))
+
+    @instrumented
+    async def get_stats(self, top_cats: int = 10) -> str:
+        return await self._read_fetchval("stats", top_cats)
+
+    @instrumented
+    async def get_mission_events(self, after_id: int, mission_ids: List[int] = None, limit: int = 500):
+        query = """
+        SELECT id, kind, mission_id, target_id, status::text AS status, assigned_cat, created_at
+        FROM mission_events
+        WHERE id > $1 AND ($2::int[] IS NULL OR mission_id = ANY($2::int[]))
+        ORDER BY id LIMIT $3
+        """
+        return [dict(row) for row in await self.pool.fetch(query, after_id, mission_ids, limit)]
+
+    async def table_versions(self, tables: Sequence[str]) -> Dict[str, int]:
+        return dict(await self._read_fetch("table_versions", list(tables)))
+
+    async def claim_idempotency_key(self, key: str, fingerprint: str, lock_seconds: float):
+        while True:
+            entry = await self._fetchrow("get_idempotency_key", key)
+            if entry is not None:
+                headers = entry["headers"]
+                return {**entry, "headers": orjson.loads(headers) if headers else None}
+            # A concurrent claim can win between the two statements; then read its entry.
+            if await self._fetchval("claim_idempotency_key", key, fingerprint, lock_seconds):
+                return None
+
+    async def save_idempotent_response(self, key: str, status: int, headers: List[List[str]], body: bytes, ttl: float):
+        await self._fetchval("save_idempotent_response", key, status, orjson.dumps(headers).decode(), body, ttl)
+
+    async def release_idempotency_key(self, key: str):
+        await self._fetchval("release_idempotency_key", key)
+
+    async def export_table(self, table: str, fmt: str = "ndjson", since_id: int = 0):
+        select = f"SELECT {EXPORT_COLUMNS[table]} FROM {table} WHERE id > $1 ORDER BY id"
+        if fmt == "ndjson":
+            # CSV with quote and delimiter bytes that JSON text never contains passes each document through verbatim.
+            query = f"SELECT row_to_json(r)::text FROM ({select}) r"
+            options = {"format": "csv", "quote": "\x01", "delimiter": "\x02"}
+        else:
+            query, options = select, {"format": "csv", "header": True}
+        # COPY pushes chunks into a bounded queue, so Postgres is only read as fast as the client
+        # consumes and memory stays constant whatever the table size.
+        chunks = asyncio.Queue(maxsize=EXPORT_QUEUE_CHUNKS)
+        async with self._read_pool().acquire() as conn:
+
+            async def put(data):
+                # COPY hands over a reused buffer; the response needs immutable bytes.
+                await chunks.put(bytes(data))
+
+            async def produce():
+                end = _EXPORT_END
+                try:
+                    await conn.copy_from_query(query, since_id, output=put, **options)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    end = e
+                await chunks.put(end)
+
+            producer = asyncio.ensure_future(produce())
+            try:
+                while True:
+                    chunk = await chunks.get()
+                    if chunk is _EXPORT_END:
+                        break
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    yield chunk
+            finally:
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+    @instrumented
     async def update_target_status(self, target_id: int, status: StatusType):
-        query = "UPDATE targets SET status = $1 WHERE id = $2 RETURNING assigned_mission"
-        mission_id = await self.pool.fetchval(query, status.value if hasattr(status, "value") else status, target_id)
-        await self._update_mission_status(mission_id)
-    
-    async def _update_mission_status(self, mission_id: int):
-        query = "SELECT * FROM targets WHERE assigned_mission = $1"
-        targets = await self.pool.fetch(query, mission_id)
-        if all(target["status"] == StatusType.FINISHED.value for target in targets):
-            await self.pool.execute("UPDATE missions SET status = $1 WHERE id = $2", StatusType.FINISHED.value, mission_id)
+        mission_id = await self._fetchval("update_target_status", status, target_id)
+        if mission_id is None:
+            raise NotFoundError("Target not found")
+        await self._invalidate("mission", mission_id)
+        return mission_id
+
+    @instrumented
+    async def update_target_statuses(self, changes: List[Tuple[int, StatusType]]):
+        rows = await self._fetch("update_target_statuses", [target_id for target_id, _ in changes], [status for _, status in changes])
+        missions = {row["target_id"]: row["assigned_mission"] for row in rows}
+        for mission_id in set(missions.values()) - {None}:
+            await self._invalidate("mission", mission_id)
+        return [
+            missions[target_id] if missions[target_id] is not None else NotFoundError("Target not found")
+            for target_id, _ in changes
+        ]
 
 # async def prueba():
 #     database = Database()
@@ -0,0 +1,206 @@
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from constants.keys import KEYS
+from services.metrics import MISSION_EVENT_SUBSCRIBERS
+
+HistoryLoader = Callable[[int, Optional[List[int]], int], Awaitable[List[dict]]]
+
+HISTORY_PAGE_SIZE = 500
+
+# Most gaps a cursor keeps; beyond that the oldest are given up like expired ones.
+MAX_GAPS = 100
+
+# Put on a subscription's queue when it overflowed; the stream ends and the client
+# is expected to reconnect with the last cursor it received.
+_DROPPED = object()
+
+
+class EventCursor:
+    """Position in the event log: every id up to last_id was seen, except the gaps.
+
+    Event ids are taken at insert, not at commit, so a long transaction can commit an
+    event after higher ids went out. Its id stays a gap until the event arrives, or
+    until MISSION_EVENTS_GAP_SECONDS pass (a rolled-back transaction leaves a gap for good).
+    Serialized as "last_id" or "last_id:gap,gap" for Last-Event-ID.
+    """
+
+    def __init__(self, last_id: int = 0, gaps: Iterable[int] = ()):
+        self.last_id = last_id
+        now = time.monotonic()
+        # id -> when it went missing; kept in ascending id order.
+        self.gaps: Dict[int, float] = {gap: now for gap in sorted(gaps)}
+
+    @classmethod
+    def parse(cls, value: str) -> "EventCursor":
+        last_id, _, gaps = value.partition(":")
+        if not last_id.isdigit() or not all(gap.isdigit() for gap in gaps.split(",") if gaps):
+            raise ValueError("Invalid event cursor")
+        cursor = cls(int(last_id), (int(gap) for gap in gaps.split(",")) if gaps else ())
+        if any(gap >= cursor.last_id for gap in cursor.gaps):
+            raise ValueError("Invalid event cursor")
+        return cursor
+
+    def __str__(self) -> str:
+        if not self.gaps:
+            return str(self.last_id)
+        return f"{self.last_id}:{','.join(map(str, self.gaps))}"
+
+    @property
+    def floor(self) -> int:
+        """Replay history after this id to find everything not seen yet."""
+        return next(iter(self.gaps)) - 1 if self.gaps else self.last_id
+
+    def seen(self, event_id: int) -> bool:
+        return event_id <= self.last_id and event_id not in self.gaps
+
+    def advance(self, event_id: int):
+        now = time.monotonic()
+        if event_id > self.last_id:
+            for gap in range(max(self.last_id + 1, event_id - MAX_GAPS), event_id):
+                self.gaps[gap] = now
+            self.last_id = event_id
+        else:
+            self.gaps.pop(event_id, None)
+        expired = now - KEYS["MISSION_EVENTS_GAP_SECONDS"]
+        while self.gaps:
+            gap, missing_since = next(iter(self.gaps.items()))
+            if missing_since > expired and len(self.gaps) <= MAX_GAPS:
+                break
+            del self.gaps[gap]
+
+
+class Subscription:
+    def __init__(self, mission_ids: Optional[Iterable[int]], max_queue: int):
+        self.mission_ids: Optional[Set[int]] = set(mission_ids) if mission_ids else None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def put(self, event: dict, cursor: str):
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait((event, cursor))
+        except asyncio.QueueFull:
+            self.end()
+
+    def end(self):
+        if self.dropped:
+            return
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_DROPPED)
+
+
+class EventBroker:
+    """Fans mission events out to stream subscribers, optionally filtered by mission id.
+
+    Events are dicts with at least "id", "kind" and "mission_id". Each subscriber has a
+    bounded queue so a slow client never holds up the others. position tracks what was
+    published, gaps included, and every event is delivered with the cursor after it.
+    """
+
+    def __init__(self, max_queue: int = KEYS["MISSION_EVENTS_QUEUE_SIZE"]):
+        self.max_queue = max_queue
+        self.position = EventCursor()
+        self._all: Set[Subscription] = set()
+        self._by_mission: Dict[int, Set[Subscription]] = {}
+
+    def subscribe(self, mission_ids: Optional[Iterable[int]] = None) -> Subscription:
+        subscription = Subscription(mission_ids, self.max_queue)
+        if subscription.mission_ids is None:
+            self._all.add(subscription)
+        else:
+            for mission_id in subscription.mission_ids:
+                self._by_mission.setdefault(mission_id, set()).add(subscription)
+        MISSION_EVENT_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription.mission_ids is None:
+            self._all.discard(subscription)
+        else:
+            for mission_id in subscription.mission_ids:
+                subscribers = self._by_mission.get(mission_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_mission[mission_id]
+        MISSION_EVENT_SUBSCRIBERS.dec()
+
+    def publish(self, event: dict):
+        self.position.advance(event["id"])
+        subscribers = self._by_mission.get(event["mission_id"], ())
+        if not self._all and not subscribers:
+            return
+        cursor = str(self.position)
+        for subscription in self._all:
+            subscription.put(event, cursor)
+        for subscription in subscribers:
+            subscription.put(event, cursor)
+
+    def close(self):
+        """End every stream, e.g. when the worker shuts down; clients resume from their last cursor."""
+        for subscription in self._all:
+            subscription.end()
+        for subscribers in self._by_mission.values():
+            for subscription in subscribers:
+                subscription.end()
+
+    async def stream(
+        self,
+        load_history: HistoryLoader,
+        mission_ids: Optional[List[int]] = None,
+        after: Optional[EventCursor] = None,
+        keepalive: float = KEYS["MISSION_EVENTS_KEEPALIVE_SECONDS"],
+    ) -> AsyncIterator[Optional[Tuple[dict, str]]]:
+        """Yield (event, cursor) for events not seen by the after cursor (replayed from
+        history), then live ones; resuming from cursor yields what came after that event.
+
+        None is yielded every keepalive seconds without events. The iterator ends when
+        the subscriber fell too far behind or the broker closed; the client should
+        resume from its last cursor.
+        """
+        subscription = self.subscribe(mission_ids)
+        try:
+            # Subscribe before reading history so nothing committed in between is lost;
+            # live events that were also replayed are skipped by id. History is only read
+            # up to what this broker has published: later events, and those still in its
+            # gaps, arrive live.
+            replayed: Set[int] = set()
+            if after is not None:
+                upto, pending = self.position.last_id, set(self.position.gaps)
+                missing = {gap for gap in pending if not after.seen(gap)} | set(after.gaps)
+                after_id = after.floor
+                while after_id < upto:
+                    events = await load_history(after_id, mission_ids, HISTORY_PAGE_SIZE)
+                    for event in events:
+                        if event["id"] > upto:
+                            break
+                        missing.discard(event["id"])
+                        if after.seen(event["id"]):
+                            continue
+                        replayed.add(event["id"])
+                        last_id = max(after.last_id, event["id"])
+                        cursor = EventCursor(last_id, (
+                            gap for gap in missing if gap < last_id and (gap > event["id"] or gap in pending)
+                        ))
+                        yield event, str(cursor)
+                    if len(events) < HISTORY_PAGE_SIZE:
+                        break
+                    after_id = events[-1]["id"]
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if item is _DROPPED:
+                    return
+                event, cursor = item
+                if event["id"] not in replayed and (after is None or not after.seen(event["id"])):
+                    yield event, cursor
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from services.metrics import GROUP_COMMIT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Writes a batch and returns one outcome per item: a result or an exception to raise to that caller.
+BatchWriter = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class GroupCommitBuffer:
+    """Collects items from concurrent callers and writes them in batches.
+
+    A batch is written when max_batch items are waiting or max_delay seconds after the
+    first one arrived, whichever comes first. Batches are written one at a time, so
+    items keep accumulating while a commit is in flight. submit() returns only after
+    the batch holding its item has been written.
+    """
+
+    def __init__(self, name: str, write_batch: BatchWriter, max_batch: int, max_delay: float):
+        self.name = name
+        self.write_batch = write_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write what is still pending, then stop."""
+        self._closed = True
+        self._ready.set()
+        self._full.set()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def submit(self, item: Any) -> Any:
+        if self._closed:
+            raise RuntimeError(f"{self.name} buffer is closed")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        self._ready.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            if not self._pending:
+                if self._closed:
+                    return
+                self._ready.clear()
+                continue
+            if len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            if len(self._pending) < self.max_batch and not self._closed:
+                self._full.clear()
+            await self._write(batch)
+
+    async def _write(self, batch: List[Tuple[Any, asyncio.Future]]):
+        GROUP_COMMIT_BATCH_SIZE.observe(self.name, value=len(batch))
+        try:
+            outcomes = await self.write_batch([item for item, _ in batch])
+        except Exception as e:
+            logger.exception("%s batch of %d failed", self.name, len(batch))
+            outcomes = [e] * len(batch)
+        for (_, future), outcome in zip(batch, outcomes):
+            # A caller that gave up (cancelled) still had its item written.
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
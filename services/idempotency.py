@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, Sequence
+
+import orjson
+
+from constants.keys import KEYS
+from services.backend import StorageBackend
+from services.pool import PoolExhaustedError
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+# Polling backoff while another worker runs the first request with the same key.
+POLL_MIN_SECONDS = 0.02
+POLL_MAX_SECONDS = 0.5
+
+
+async def _send_json(send, status: int, detail: str, headers: Sequence[tuple] = ()):
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware that runs a POST at most once per Idempotency-Key header.
+
+    The first request with a key claims it in the storage backend, runs, and stores
+    its response for IDEMPOTENCY_TTL_SECONDS. Retries with the same key and body get
+    that response back without running the endpoint. A retry arriving while the first
+    request is still running waits for it (in this worker on the request itself, across
+    workers by polling the claim) for up to IDEMPOTENCY_LOCK_SECONDS. Responses of 500
+    and above are not stored, so a retry after a failure runs again. An exhausted pool
+    gets the same 503 and Retry-After as in the app.
+    """
+
+    def __init__(
+        self,
+        app,
+        backend: StorageBackend,
+        paths: Sequence[str] = ("/cats", "/missions", "/notes"),
+        ttl: float = KEYS["IDEMPOTENCY_TTL_SECONDS"],
+        lock_seconds: float = KEYS["IDEMPOTENCY_LOCK_SECONDS"],
+    ):
+        self.app = app
+        self.backend = backend
+        self.paths = set(paths)
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        key = next((value.decode("latin-1") for name, value in scope["headers"] if name == IDEMPOTENCY_HEADER.encode()), None)
+        if key is None:
+            return await self.app(scope, receive, send)
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            return await _send_json(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+
+        body = await self._read_body(receive)
+        fingerprint = hashlib.blake2b(
+            b"\0".join((scope["method"].encode(), scope["path"].encode(), scope["query_string"], body)), digest_size=16
+        ).hexdigest()
+        deadline = time.monotonic() + self.lock_seconds
+        poll = POLL_MIN_SECONDS
+        while True:
+            running = self._inflight.get(key)
+            if running is not None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(running), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    return await self._still_running(send)
+                continue
+            # This runs outside the app's exception handlers, so storage errors are answered here.
+            try:
+                entry = await self.backend.claim_idempotency_key(key, fingerprint, self.lock_seconds)
+            except PoolExhaustedError as e:
+                return await _send_json(send, 503, str(e), [(b"retry-after", str(KEYS["DB_POOL_RETRY_AFTER"]).encode())])
+            except Exception as e:
+                logger.exception("Could not claim idempotency key %r", key)
+                return await _send_json(send, 500, str(e))
+            if entry is None:
+                break
+            if entry["fingerprint"] != fingerprint:
+                return await _send_json(send, 422, "Idempotency-Key was already used for a different request")
+            if entry["status"] is not None:
+                return await self._replay(send, entry)
+            if time.monotonic() >= deadline:
+                return await self._still_running(send)
+            await asyncio.sleep(poll)
+            poll = min(poll * 2, POLL_MAX_SECONDS)
+
+        done = asyncio.get_running_loop().create_future()
+        self._inflight[key] = done
+        try:
+            await self._run(scope, receive, send, key, body)
+        finally:
+            del self._inflight[key]
+            done.set_result(None)
+
+    async def _run(self, scope, receive, send, key: str, body: bytes):
+        response = {"status": None, "headers": [], "body": [], "complete": False}
+        replayed_body = False
+
+        async def receive_wrapper():
+            nonlocal replayed_body
+            if not replayed_body:
+                replayed_body = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [[name.decode("latin-1"), value.decode("latin-1")] for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+                response["complete"] = not message.get("more_body", False)
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+            if response["complete"] and response["status"] < 500:
+                try:
+                    await self.backend.save_idempotent_response(
+                        key, response["status"], response["headers"], b"".join(response["body"]), self.ttl
+                    )
+                    stored = True
+                except Exception as e:
+                    # The response already went out; a retry runs the request again.
+                    logger.warning("Could not store response for idempotency key %r: %s", key, e)
+        finally:
+            if not stored:
+                try:
+                    await self.backend.release_idempotency_key(key)
+                except Exception as e:
+                    # The claim still lapses after lock_seconds.
+                    logger.warning("Could not release idempotency key %r: %s", key, e)
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    async def _replay(send, entry: dict):
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in entry["headers"]]
+        await send({"type": "http.response.start", "status": entry["status"], "headers": [*headers, (b"idempotent-replayed", b"true")]})
+        await send({"type": "http.response.body", "body": bytes(entry["body"])})
+
+    @staticmethod
+    async def _still_running(send):
+        await _send_json(send, 409, "A request with this Idempotency-Key is still being processed", [(b"retry-after", b"1")])
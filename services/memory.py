@@ -0,0 +1,607 @@
+import asyncio
+import csv
+import heapq
+import io
+import logging
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from constants.keys import KEYS
+from models.models import Cat, Note, StatusType
+from services.backend import NotFoundError, StorageBackend
+from services.breeds import BreedCatalog
+from services.metrics import instrumented
+from utils.schemas import MissionCreate
+
+logger = logging.getLogger(__name__)
+
+CLOSED_STATUSES = (StatusType.FINISHED.value, StatusType.CANCELLED.value)
+EXPORT_CHUNK_ROWS = 1000
+WORD = re.compile(r"\w+")
+
+
+class _Table:
+    """Rows by id plus sorted id lists per indexed column, for keyset scans without a full sort."""
+
+    def __init__(self, columns: List[str], indexed: List[str] = ()):
+        self.columns = columns
+        self.rows: Dict[int, dict] = {}
+        self.ids: List[int] = []
+        self.indexes: Dict[str, Dict[object, List[int]]] = {column: {} for column in indexed}
+        self.next_id = 1
+        # Bumped by every write; starts at the creation time in milliseconds so a restarted
+        # process never repeats an ETag from before.
+        self.version = time.time_ns() // 1_000_000
+
+    def insert(self, values: dict) -> dict:
+        row = {"id": self.next_id, **values}
+        self.next_id += 1
+        self.version += 1
+        self.rows[row["id"]] = row
+        # Ids only grow, so appending keeps every list sorted.
+        self.ids.append(row["id"])
+        for column, index in self.indexes.items():
+            index.setdefault(row[column], []).append(row["id"])
+        return row
+
+    def _unindex(self, column: str, value, row_id: int):
+        ids = self.indexes[column][value]
+        del ids[bisect_left(ids, row_id)]
+        if not ids:
+            del self.indexes[column][value]
+
+    def update(self, row: dict, **values):
+        self.version += 1
+        for column, value in values.items():
+            if column in self.indexes and row[column] != value:
+                self._unindex(column, row[column], row["id"])
+                insort(self.indexes[column].setdefault(value, []), row["id"])
+            row[column] = value
+
+    def delete(self, row_id: int):
+        row = self.rows.pop(row_id)
+        self.version += 1
+        del self.ids[bisect_left(self.ids, row_id)]
+        for column in self.indexes:
+            self._unindex(column, row[column], row_id)
+
+    def lookup(self, column: str, value) -> List[int]:
+        return self.indexes[column].get(value, [])
+
+    def page(self, limit: int, after_id: int = 0, **filters) -> List[dict]:
+        """Rows with id > after_id matching every column=value filter, in id order."""
+        candidates = self.ids
+        if filters:
+            # Scan the shortest index and check the other filters on the rows.
+            candidates = min((self.lookup(column, value) for column, value in filters.items()), key=len)
+        result = []
+        for row_id in candidates[bisect_right(candidates, after_id):]:
+            row = self.rows[row_id]
+            if all(row[column] == value for column, value in filters.items()):
+                result.append(dict(row))
+                if len(result) >= limit:
+                    break
+        return result
+
+    def dump(self) -> dict:
+        return {"next_id": self.next_id, "rows": [self.rows[row_id] for row_id in self.ids]}
+
+    def load(self, snapshot: dict):
+        for row in snapshot["rows"]:
+            self.next_id = row["id"]
+            self.insert({column: row[column] for column in self.columns})
+        self.next_id = snapshot["next_id"]
+
+
+class MemoryDatabase(StorageBackend):
+    """In-process storage with the same validation and status cascade as Database.
+
+    Every operation runs without awaiting between its checks and writes, so it is
+    atomic on the event loop. Tables are optionally persisted to MEMORY_SNAPSHOT_PATH
+    on shutdown and every MEMORY_SNAPSHOT_INTERVAL seconds while there are changes.
+    Mission events are published directly and the last MISSION_EVENTS_HISTORY are
+    kept for resuming streams. Idempotency keys live in an LRU of max_idempotency_keys
+    entries and are not persisted.
+    """
+
+    def __init__(
+        self,
+        breed_catalog: BreedCatalog = None,
+        snapshot_path: Optional[str] = KEYS["MEMORY_SNAPSHOT_PATH"],
+        snapshot_interval: float = KEYS["MEMORY_SNAPSHOT_INTERVAL"],
+        max_idempotency_keys: int = KEYS["IDEMPOTENCY_MAX_KEYS"],
+    ):
+        super().__init__(breed_catalog)
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.max_idempotency_keys = max_idempotency_keys
+        self.idempotency_keys: "OrderedDict[str, dict]" = OrderedDict()
+        self._reset()
+        self._dirty = False
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    def _reset(self):
+        self.cats = _Table(["name", "years_of_experience", "breed", "salary"], ["breed"])
+        self.missions = _Table(["assigned_cat", "status", "title"], ["assigned_cat", "status"])
+        self.targets = _Table(["assigned_mission", "status", "name", "country"], ["assigned_mission"])
+        self.notes = _Table(["target_id", "message", "created_at"], ["target_id"])
+        self.event_log = deque(maxlen=KEYS["MISSION_EVENTS_HISTORY"])
+        self.next_event_id = 1
+
+    def _tables(self) -> Dict[str, _Table]:
+        return {"cats": self.cats, "missions": self.missions, "targets": self.targets, "notes": self.notes}
+
+    async def startup(self):
+        self._load_snapshot()
+        await self.breed_catalog.start()
+        if self.snapshot_path and self.snapshot_interval > 0:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def shutdown(self):
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+            try:
+                await self._snapshot_task
+            except asyncio.CancelledError:
+                pass
+            self._snapshot_task = None
+        await self.breed_catalog.stop()
+        self.save_snapshot()
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            if self._dirty:
+                self.save_snapshot()
+
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = orjson.loads(f.read())
+            loaded_at = datetime.now(timezone.utc)
+            for note in snapshot["notes"]["rows"]:
+                # Snapshots from before notes had a creation time date them at loading.
+                note["created_at"] = datetime.fromisoformat(note["created_at"]) if "created_at" in note else loaded_at
+            self._reset()
+            for name, table in self._tables().items():
+                table.load(snapshot[name])
+            self.next_event_id = snapshot.get("next_event_id", 1)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable memory snapshot %s: %s", self.snapshot_path, e)
+            self._reset()
+
+    def save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                snapshot = {name: table.dump() for name, table in self._tables().items()}
+                f.write(orjson.dumps({**snapshot, "next_event_id": self.next_event_id}))
+            os.replace(tmp_path, self.snapshot_path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning("Could not write memory snapshot %s: %s", self.snapshot_path, e)
+
+    @staticmethod
+    def _status(status) -> str:
+        return status.value if hasattr(status, "value") else status
+
+    def _emit(self, kind: str, mission: dict, target: dict = None):
+        event = {
+            "id": self.next_event_id,
+            "kind": kind,
+            "mission_id": mission["id"],
+            "target_id": target["id"] if target else None,
+            "status": (target or mission)["status"],
+            "assigned_cat": None if target else mission["assigned_cat"],
+            "created_at": datetime.now(timezone.utc),
+        }
+        self.next_event_id += 1
+        self.event_log.append(event)
+        self.events.publish(event)
+
+    def _check_targets(self, mission: MissionCreate):
+        if len(mission.targets) == 0:
+            raise ValueError("No targets provided")
+        if len(mission.targets) > 3:
+            raise ValueError("Too many targets provided")
+
+    def _insert_mission(self, mission: MissionCreate) -> int:
+        if mission.assigned_cat is not None and mission.assigned_cat not in self.cats.rows:
+            raise ValueError("Assigned cat does not exist")
+        row = self.missions.insert({
+            "assigned_cat": mission.assigned_cat, "status": self._status(mission.status), "title": mission.title,
+        })
+        for target in mission.targets:
+            self.targets.insert({
+                "assigned_mission": row["id"], "status": self._status(target.status),
+                "name": target.name, "country": target.country,
+            })
+        self._emit("mission_created", row)
+        self._dirty = True
+        return row["id"]
+
+    def _insert_note(self, note: Note) -> int:
+        target = self.targets.rows.get(note.target_id)
+        if target is None:
+            raise ValueError("Target does not exist")
+        if target["status"] in CLOSED_STATUSES:
+            raise ValueError("Target is finished or cancelled")
+        self._dirty = True
+        return self.notes.insert({
+            "target_id": note.target_id, "message": note.message, "created_at": datetime.now(timezone.utc),
+        })["id"]
+
+    @instrumented
+    async def create_cat(self, cat: Cat):
+        breed = await self.breed_catalog.lookup(cat.breed)
+        if breed is None:
+            raise ValueError("Invalid breed")
+        cat.breed = breed
+        self._dirty = True
+        return dict(self.cats.insert({
+            "name": cat.name, "years_of_experience": cat.years_of_experience, "breed": breed, "salary": cat.salary,
+        }))
+
+    @instrumented
+    async def create_cats_bulk(self, cats: List[Cat]):
+        """Insert many cats, returning the new id or a ValueError for each input cat."""
+        breeds = [await self.breed_catalog.lookup(cat.breed) for cat in cats]
+        outcomes = []
+        for cat, breed in zip(cats, breeds):
+            if breed is None:
+                outcomes.append(ValueError("Invalid breed"))
+                continue
+            outcomes.append(self.cats.insert({
+                "name": cat.name, "years_of_experience": cat.years_of_experience, "breed": breed, "salary": cat.salary,
+            })["id"])
+        self._dirty = True
+        return outcomes
+
+    @instrumented
+    async def delete_cat(self, cat_id: int):
+        if self.missions.lookup("assigned_cat", cat_id):
+            raise ValueError("Cat is assigned to a mission")
+        if cat_id not in self.cats.rows:
+            raise ValueError("Cat not found")
+        self.cats.delete(cat_id)
+        self._dirty = True
+
+    @instrumented
+    async def update_cat_salary(self, cat_id: int, salary: int):
+        cat = self.cats.rows.get(cat_id)
+        if cat is None:
+            raise NotFoundError("Cat not found")
+        self.cats.update(cat, salary=salary)
+        self._dirty = True
+
+    @instrumented
+    async def get_cats(self, limit: int, after_id: int = 0, breed: str = None):
+        if breed is None:
+            return self.cats.page(limit, after_id)
+        return self.cats.page(limit, after_id, breed=await self.breed_catalog.lookup(breed) or breed)
+
+    def _cat_loads(self) -> Dict[int, int]:
+        loads: Dict[int, int] = {}
+        for mission in self.missions.rows.values():
+            if mission["assigned_cat"] is not None and mission["status"] not in CLOSED_STATUSES:
+                loads[mission["assigned_cat"]] = loads.get(mission["assigned_cat"], 0) + 1
+        return loads
+
+    def _ranked_cats(self, limit: int, max_active_missions: int) -> List[dict]:
+        loads = self._cat_loads()
+        available = (
+            {**cat, "active_missions": loads.get(cat["id"], 0)}
+            for cat in self.cats.rows.values() if loads.get(cat["id"], 0) < max_active_missions
+        )
+        return heapq.nsmallest(
+            limit, available, key=lambda cat: (cat["active_missions"], -cat["years_of_experience"], cat["salary"], cat["id"])
+        )
+
+    @instrumented
+    async def get_available_cats(self, limit: int, max_active_missions: int):
+        return self._ranked_cats(limit, max_active_missions)
+
+    @instrumented
+    async def get_cat(self, cat_id: int, min_version: int = None):
+        cat = self.cats.rows.get(cat_id)
+        return dict(cat) if cat else None
+
+    @instrumented
+    async def create_mission(self, mission: MissionCreate):
+        self._check_targets(mission)
+        return self._insert_mission(mission)
+
+    @instrumented
+    async def create_missions_bulk(self, missions: List[MissionCreate]):
+        """Insert many missions with their targets, returning the new id or a ValueError per mission."""
+        outcomes = []
+        for mission in missions:
+            try:
+                self._check_targets(mission)
+                outcomes.append(self._insert_mission(mission))
+            except ValueError as e:
+                outcomes.append(e)
+        return outcomes
+
+    @instrumented
+    async def delete_mission(self, mission_id: int):
+        mission = self.missions.rows.get(mission_id)
+        if mission is None:
+            raise ValueError("Mission does not exist")
+        if mission["assigned_cat"] is not None:
+            raise ValueError("Mission is assigned to a cat, cannot be deleted")
+        for target_id in self.targets.lookup("assigned_mission", mission_id):
+            self._set_target_status(self.targets.rows[target_id], StatusType.CANCELLED.value)
+        self._set_mission_status(mission, StatusType.CANCELLED.value)
+        self._dirty = True
+
+    @instrumented
+    async def assign_cat_to_mission(self, mission_id: int, cat_id: int):
+        if cat_id not in self.cats.rows:
+            raise NotFoundError("Cat not found")
+        mission = self.missions.rows.get(mission_id)
+        if mission is None:
+            raise ValueError("Mission does not exist")
+        if mission["assigned_cat"] is not None:
+            raise ValueError("Mission is already assigned to a cat")
+        self.missions.update(mission, assigned_cat=cat_id)
+        self._emit("mission_assigned", mission)
+        self._dirty = True
+
+    @instrumented
+    async def auto_assign_cat(self, mission_id: int, max_active_missions: int):
+        mission = self.missions.rows.get(mission_id)
+        if mission is None:
+            raise NotFoundError("Mission not found")
+        if mission["assigned_cat"] is not None:
+            raise ValueError("Mission is already assigned to a cat")
+        ranked = self._ranked_cats(1, max_active_missions)
+        if not ranked:
+            return None
+        cat = ranked[0]
+        self.missions.update(mission, assigned_cat=cat["id"])
+        self._emit("mission_assigned", mission)
+        self._dirty = True
+        if mission["status"] not in CLOSED_STATUSES:
+            cat["active_missions"] += 1
+        return cat
+
+    def _set_mission_status(self, mission: dict, status: str):
+        if mission["status"] != status:
+            self.missions.update(mission, status=status)
+            self._emit("mission_status", mission)
+
+    def _set_target_status(self, target: dict, status: str):
+        if target["status"] != status:
+            self.targets.update(target, status=status)
+            self._emit("target_status", self.missions.rows[target["assigned_mission"]], target)
+
+    def _mission_filters(self, status: StatusType = None, assigned_cat: int = None) -> dict:
+        filters = {}
+        if status is not None:
+            filters["status"] = self._status(status)
+        if assigned_cat is not None:
+            filters["assigned_cat"] = assigned_cat
+        return filters
+
+    def _mission_tree(self, mission: dict, include_notes: bool) -> str:
+        targets = []
+        for target_id in self.targets.lookup("assigned_mission", mission["id"]):
+            target = dict(self.targets.rows[target_id])
+            if include_notes:
+                target["notes"] = [self.notes.rows[note_id] for note_id in self.notes.lookup("target_id", target_id)]
+            targets.append(target)
+        return orjson.dumps({**mission, "targets": targets}).decode()
+
+    @instrumented
+    async def get_missions(self, limit: int, after_id: int = 0, status: StatusType = None, assigned_cat: int = None):
+        return self.missions.page(limit, after_id, **self._mission_filters(status, assigned_cat))
+
+    @instrumented
+    async def get_mission_trees(self, limit: int, after_id: int = 0, status: StatusType = None, assigned_cat: int = None, include_notes: bool = False):
+        """Like get_missions, but each row carries the mission with its targets (and notes) as a JSON document."""
+        missions = self.missions.page(limit, after_id, **self._mission_filters(status, assigned_cat))
+        return [{"id": mission["id"], "document": self._mission_tree(mission, include_notes)} for mission in missions]
+
+    @instrumented
+    async def get_mission(self, mission_id: int, min_version: int = None):
+        mission = self.missions.rows.get(mission_id)
+        return dict(mission) if mission else None
+
+    @instrumented
+    async def get_mission_tree(self, mission_id: int, include_notes: bool = False):
+        """Return the mission with its targets (and notes) as a JSON document, or None."""
+        mission = self.missions.rows.get(mission_id)
+        return self._mission_tree(mission, include_notes) if mission else None
+
+    @instrumented
+    async def update_target_status(self, target_id: int, status: StatusType):
+        target = self.targets.rows.get(target_id)
+        if target is None:
+            raise NotFoundError("Target not found")
+        status = self._status(status)
+        self._set_target_status(target, status)
+        mission_id = target["assigned_mission"]
+        siblings = self.targets.lookup("assigned_mission", mission_id)
+        if status == StatusType.FINISHED.value and all(
+            self.targets.rows[sibling]["status"] == StatusType.FINISHED.value for sibling in siblings
+        ):
+            self._set_mission_status(self.missions.rows[mission_id], StatusType.FINISHED.value)
+        self._dirty = True
+        return mission_id
+
+    @instrumented
+    async def update_target_statuses(self, changes: List[Tuple[int, StatusType]]):
+        outcomes, finishing = [], set()
+        for target_id, status in changes:
+            target = self.targets.rows.get(target_id)
+            if target is None:
+                outcomes.append(NotFoundError("Target not found"))
+                continue
+            self._set_target_status(target, self._status(status))
+            outcomes.append(target["assigned_mission"])
+            if self._status(status) == StatusType.FINISHED.value:
+                finishing.add(target["assigned_mission"])
+        for mission_id in sorted(finishing):
+            siblings = self.targets.lookup("assigned_mission", mission_id)
+            if all(self.targets.rows[sibling]["status"] == StatusType.FINISHED.value for sibling in siblings):
+                self._set_mission_status(self.missions.rows[mission_id], StatusType.FINISHED.value)
+        self._dirty = True
+        return outcomes
+
+    @instrumented
+    async def create_note(self, note: Note):
+        return self._insert_note(note)
+
+    @instrumented
+    async def create_notes_bulk(self, notes: List[Note]):
+        """Insert many notes, returning the new id or a ValueError per note."""
+        outcomes = []
+        for note in notes:
+            try:
+                outcomes.append(self._insert_note(note))
+            except ValueError as e:
+                outcomes.append(e)
+        return outcomes
+
+    @instrumented
+    async def get_notes(self, limit: int, after: Tuple[datetime, int] = None, target_id: int = None, since: datetime = None):
+        """Ids are handed out in creation order here, so pages are id ranges."""
+        after_id = after[1] if after else 0
+        if since is not None:
+            ids = self.notes.ids
+            first = bisect_left(ids, since, key=lambda note_id: self.notes.rows[note_id]["created_at"])
+            if first == len(ids):
+                return []
+            after_id = max(after_id, ids[first] - 1)
+        if target_id is None:
+            return self.notes.page(limit, after_id)
+        return self.notes.page(limit, after_id, target_id=target_id)
+
+    @instrumented
+    async def search_notes(
+        self, query: str, limit: int, after: Tuple[float, int] = None,
+        target_id: int = None, mission_id: int = None, cat_id: int = None,
+    ):
+        """Notes containing every word of query (no stemming or operators), ranked by the share of matching words."""
+        terms = set(WORD.findall(query.lower()))
+        if not terms:
+            return []
+        target_ids = None
+        if target_id is not None:
+            target_ids = {target_id}
+        if mission_id is not None:
+            in_mission = set(self.targets.lookup("assigned_mission", mission_id))
+            target_ids = in_mission if target_ids is None else target_ids & in_mission
+        if cat_id is not None:
+            of_cat = {
+                target for mission in self.missions.lookup("assigned_cat", cat_id)
+                for target in self.targets.lookup("assigned_mission", mission)
+            }
+            target_ids = of_cat if target_ids is None else target_ids & of_cat
+        if target_ids is None:
+            candidates = self.notes.ids
+        else:
+            candidates = [note_id for target in target_ids for note_id in self.notes.lookup("target_id", target)]
+        hits = []
+        for note_id in candidates:
+            note = self.notes.rows[note_id]
+            words = WORD.findall(note["message"].lower())
+            if not terms.issubset(words):
+                continue
+            rank = sum(word in terms for word in words) / len(words)
+            if after is None or (rank, note_id) < after:
+                hits.append({**note, "rank": rank})
+        hits.sort(key=lambda hit: (hit["rank"], hit["id"]), reverse=True)
+        return hits[:limit]
+
+    @instrumented
+    async def get_stats(self, top_cats: int = 10) -> str:
+        """Computed from the tables on each call; Database keeps summary tables instead."""
+        target_counts: Dict[tuple, int] = {}
+        for target in self.targets.rows.values():
+            key = (target["country"], target["status"])
+            target_counts[key] = target_counts.get(key, 0) + 1
+        salary_by_breed = {}
+        for breed in sorted(self.cats.indexes["breed"]):
+            cat_ids = self.cats.lookup("breed", breed)
+            total = sum(self.cats.rows[cat_id]["salary"] for cat_id in cat_ids)
+            salary_by_breed[breed] = {"cats": len(cat_ids), "total_salary": total, "average_salary": round(total / len(cat_ids), 2)}
+        loads = self._cat_loads()
+        busiest = sorted(loads.items(), key=lambda load: (-load[1], load[0]))[:top_cats]
+        return orjson.dumps({
+            "missions_by_status": {status.value: len(self.missions.lookup("status", status.value)) for status in StatusType},
+            "targets_by_country": {
+                country: {status.value: target_counts[country, status.value] for status in StatusType if (country, status.value) in target_counts}
+                for country in sorted({country for country, _ in target_counts})
+            },
+            "salary_by_breed": salary_by_breed,
+            "busiest_cats": [{"cat_id": cat_id, "active_missions": count} for cat_id, count in busiest],
+        }).decode()
+
+    @instrumented
+    async def get_mission_events(self, after_id: int, mission_ids: List[int] = None, limit: int = 500):
+        wanted = set(mission_ids) if mission_ids else None
+        events = []
+        for event in self.event_log:
+            if event["id"] > after_id and (wanted is None or event["mission_id"] in wanted):
+                events.append(event)
+                if len(events) >= limit:
+                    break
+        return events
+
+    async def table_versions(self, tables: Sequence[str]) -> Dict[str, int]:
+        return {name: self._tables()[name].version for name in tables}
+
+    async def claim_idempotency_key(self, key: str, fingerprint: str, lock_seconds: float):
+        now = time.monotonic()
+        entry = self.idempotency_keys.get(key)
+        if entry is not None and entry["expires_at"] > now:
+            self.idempotency_keys.move_to_end(key)
+            return entry
+        self.idempotency_keys[key] = {
+            "fingerprint": fingerprint, "status": None, "headers": None, "body": None, "expires_at": now + lock_seconds,
+        }
+        self.idempotency_keys.move_to_end(key)
+        while len(self.idempotency_keys) > self.max_idempotency_keys:
+            self.idempotency_keys.popitem(last=False)
+        return None
+
+    async def save_idempotent_response(self, key: str, status: int, headers: List[List[str]], body: bytes, ttl: float):
+        entry = self.idempotency_keys.get(key)
+        if entry is not None and entry["status"] is None:
+            entry.update(status=status, headers=headers, body=body, expires_at=time.monotonic() + ttl)
+
+    async def release_idempotency_key(self, key: str):
+        entry = self.idempotency_keys.get(key)
+        if entry is not None and entry["status"] is None:
+            del self.idempotency_keys[key]
+
+    async def export_table(self, table: str, fmt: str = "ndjson", since_id: int = 0):
+        source = self._tables()[table]
+        columns = ["id", *source.columns]
+        ids = source.ids[bisect_right(source.ids, since_id):]
+        if fmt == "csv":
+            yield (",".join(columns) + "\n").encode()
+        for start in range(0, len(ids), EXPORT_CHUNK_ROWS):
+            rows = [source.rows[row_id] for row_id in ids[start:start + EXPORT_CHUNK_ROWS] if row_id in source.rows]
+            if fmt == "ndjson":
+                yield b"".join(orjson.dumps(row) + b"\n" for row in rows)
+            else:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, lineterminator="\n")
+                writer.writerows([row[column] for column in columns] for row in rows)
+                yield buffer.getvalue().encode()
+            # Let other requests run between chunks.
+            await asyncio.sleep(0)
@@ -0,0 +1,213 @@
+import functools
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from starlette.routing import Match
+
+from constants.keys import KEYS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        self._values[labels] = value
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (non-cumulative, last one is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, *labels, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        labelnames = self.labelnames + ("le",)
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_format_labels(labelnames, labels + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {repr(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]):
+        """Register a callable producing extra exposition lines at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method",)
+))
+DB_QUERY_DURATION = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Duration of Database method calls", ("method",)
+))
+DB_QUERY_ROWS = REGISTRY.register(Counter(
+    "db_query_rows_total", "Rows returned by Database method calls", ("method",)
+))
+DB_QUERY_ERRORS = REGISTRY.register(Counter(
+    "db_query_errors_total", "Database method calls that raised", ("method",)
+))
+BREED_FETCHES = REGISTRY.register(Counter(
+    "breed_catalog_fetches_total", "Calls to the external breed API", ("outcome",)
+))
+GROUP_COMMIT_BATCH_SIZE = REGISTRY.register(Histogram(
+    "group_commit_batch_size", "Items written per group commit", ("buffer",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+))
+MISSION_EVENT_SUBSCRIBERS = REGISTRY.register(Gauge(
+    "mission_event_subscribers", "Open mission event streams (SSE and WebSocket)"
+))
+
+
+def sample_lines(name: str, help: str, type: str, labelnames: Sequence[str], values: Dict[Tuple, float]) -> Iterable[str]:
+    """Exposition lines for a metric whose values are read at scrape time (for collectors)."""
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {type}"
+    for labels, value in values.items():
+        yield f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+
+
+def _row_count(result) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+def instrumented(method):
+    """Time a Database method, count the rows it returns and log it when slower than SLOW_QUERY_MS."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = await method(*args, **kwargs)
+        except Exception:
+            DB_QUERY_ERRORS.inc(name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            DB_QUERY_DURATION.observe(name, value=elapsed)
+            if KEYS["SLOW_QUERY_MS"] and elapsed * 1000 >= KEYS["SLOW_QUERY_MS"]:
+                logger.warning("Slow query: %s took %.1f ms", name, elapsed * 1000)
+        DB_QUERY_ROWS.inc(name, amount=_row_count(result))
+        return result
+
+    return wrapper
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        # Answered before routing (idempotent replays) or without a matching route: match
+        # the path against the app's routes, so only unknown paths share "<unmatched>".
+        for candidate in getattr(getattr(scope.get("app"), "router", None), "routes", ()):
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+            if match == Match.PARTIAL and route is None:
+                route = candidate
+    return getattr(route, "path", "<unmatched>")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template and status code."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"]
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(method)
+            HTTP_REQUEST_DURATION.observe(method, _route_template(scope), str(status[0]), value=time.perf_counter() - started)
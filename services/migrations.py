@@ -0,0 +1,426 @@
+import logging
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Key for pg_advisory_xact_lock so only one worker applies migrations at a time.
+MIGRATION_LOCK_ID = 7_202_506_001
+
+# Statement-level triggers see the rows a statement changed as the transition tables
+# new_rows and old_rows. Per operation, these are those rows as they are now (delta +1)
+# and as they were (delta -1), so one aggregate over them serves INSERT, UPDATE and DELETE.
+# Deltas are summed per key, so an UPDATE that leaves a key alone writes nothing.
+STATS_CHANGES = {
+    "INSERT": "SELECT *, 1 AS delta FROM new_rows",
+    "UPDATE": "SELECT *, 1 AS delta FROM new_rows UNION ALL SELECT *, -1 FROM old_rows",
+    "DELETE": "SELECT *, -1 AS delta FROM old_rows",
+}
+
+
+def stats_trigger_function(name: str, body: str) -> str:
+    """A trigger function running body with {changes} filled in for the firing operation.
+
+    Each operation gets its own static copy because plpgsql caches plans for static SQL,
+    while EXECUTE would plan the statement again on every write.
+    """
+    branches = "".join(
+        f"            {'IF' if i == 0 else 'ELSIF'} TG_OP = '{op}' THEN{body.format(changes=changes).rstrip()}\n"
+        for i, (op, changes) in enumerate(STATS_CHANGES.items())
+    )
+    return f"""
+        CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+        DECLARE
+            changed BIGINT;
+        BEGIN
+{branches}            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """
+
+
+MIGRATIONS = [
+    (1, "initial schema", """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'status_type') THEN
+                CREATE TYPE status_type AS ENUM ('pending', 'in_progress', 'finished', 'cancelled');
+            END IF;
+        END
+        $$;
+        CREATE TABLE IF NOT EXISTS cats (id SERIAL PRIMARY KEY, name VARCHAR(255) NOT NULL, years_of_experience INT NOT NULL, breed VARCHAR(255) NOT NULL, salary INT NOT NULL);
+        CREATE TABLE IF NOT EXISTS missions (id SERIAL PRIMARY KEY, assigned_cat INT NULL, status status_type NOT NULL, title VARCHAR(255) NOT NULL, FOREIGN KEY (assigned_cat) REFERENCES cats(id));
+        CREATE TABLE IF NOT EXISTS targets (id SERIAL PRIMARY KEY, assigned_mission INT NOT NULL, status status_type NOT NULL, name VARCHAR(255) NOT NULL, country VARCHAR(255) NOT NULL, FOREIGN KEY (assigned_mission) REFERENCES missions(id));
+        CREATE TABLE IF NOT EXISTS notes (id SERIAL PRIMARY KEY, target_id INT NOT NULL, message VARCHAR(255) NOT NULL, FOREIGN KEY (target_id) REFERENCES targets(id));
+    """),
+    (2, "foreign key and status indexes", """
+        CREATE INDEX IF NOT EXISTS missions_assigned_cat_idx ON missions (assigned_cat, id);
+        CREATE INDEX IF NOT EXISTS targets_assigned_mission_idx ON targets (assigned_mission, id);
+        CREATE INDEX IF NOT EXISTS notes_target_id_idx ON notes (target_id, id);
+        CREATE INDEX IF NOT EXISTS missions_status_idx ON missions (status, id);
+        CREATE INDEX IF NOT EXISTS targets_status_idx ON targets (status, id);
+        CREATE INDEX IF NOT EXISTS cats_breed_idx ON cats (breed, id);
+    """),
+    (3, "mission event log with LISTEN/NOTIFY triggers", """
+        CREATE TABLE IF NOT EXISTS mission_events (
+            id BIGSERIAL PRIMARY KEY,
+            kind TEXT NOT NULL,
+            mission_id INT NOT NULL,
+            target_id INT NULL,
+            status status_type NOT NULL,
+            assigned_cat INT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        CREATE INDEX IF NOT EXISTS mission_events_mission_id_idx ON mission_events (mission_id, id);
+
+        -- Statement-level triggers write one event per changed row, so bulk COPYs and
+        -- multi-row UPDATEs cost a single INSERT ... SELECT from the transition tables.
+        CREATE OR REPLACE FUNCTION missions_inserted_events() RETURNS trigger AS $$
+        DECLARE
+            event mission_events;
+        BEGIN
+            FOR event IN
+                INSERT INTO mission_events (kind, mission_id, status, assigned_cat)
+                SELECT 'mission_created', id, status, assigned_cat FROM new_rows ORDER BY id
+                RETURNING *
+            LOOP
+                PERFORM pg_notify('mission_events', row_to_json(event)::text);
+            END LOOP;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION missions_updated_events() RETURNS trigger AS $$
+        DECLARE
+            event mission_events;
+        BEGIN
+            FOR event IN
+                INSERT INTO mission_events (kind, mission_id, status, assigned_cat)
+                SELECT kind, id, status, assigned_cat FROM (
+                    SELECT 'mission_status' AS kind, n.id, n.status, n.assigned_cat
+                    FROM new_rows n JOIN old_rows o USING (id) WHERE n.status IS DISTINCT FROM o.status
+                    UNION ALL
+                    SELECT 'mission_assigned', n.id, n.status, n.assigned_cat
+                    FROM new_rows n JOIN old_rows o USING (id) WHERE n.assigned_cat IS DISTINCT FROM o.assigned_cat
+                ) changes ORDER BY id
+                RETURNING *
+            LOOP
+                PERFORM pg_notify('mission_events', row_to_json(event)::text);
+            END LOOP;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION targets_updated_events() RETURNS trigger AS $$
+        DECLARE
+            event mission_events;
+        BEGIN
+            FOR event IN
+                INSERT INTO mission_events (kind, mission_id, target_id, status)
+                SELECT 'target_status', n.assigned_mission, n.id, n.status
+                FROM new_rows n JOIN old_rows o USING (id) WHERE n.status IS DISTINCT FROM o.status
+                ORDER BY n.id
+                RETURNING *
+            LOOP
+                PERFORM pg_notify('mission_events', row_to_json(event)::text);
+            END LOOP;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS missions_inserted_events ON missions;
+        CREATE TRIGGER missions_inserted_events AFTER INSERT ON missions
+            REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION missions_inserted_events();
+        DROP TRIGGER IF EXISTS missions_updated_events ON missions;
+        CREATE TRIGGER missions_updated_events AFTER UPDATE ON missions
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION missions_updated_events();
+        DROP TRIGGER IF EXISTS targets_updated_events ON targets;
+        CREATE TRIGGER targets_updated_events AFTER UPDATE ON targets
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION targets_updated_events();
+    """),
+    (4, "per-table change versions for ETags", """
+        -- Versions start at the creation time in milliseconds, so a recreated database
+        -- never hands out an ETag that a client may still hold from the old one.
+        CREATE TABLE IF NOT EXISTS table_versions (table_name TEXT PRIMARY KEY, version BIGINT NOT NULL);
+        INSERT INTO table_versions (table_name, version)
+        SELECT t.table_name, (extract(epoch FROM clock_timestamp()) * 1000)::bigint
+        FROM unnest(ARRAY['cats', 'missions', 'targets', 'notes']) AS t (table_name)
+        ON CONFLICT (table_name) DO NOTHING;
+
+        -- One bump per statement, committed (and rolled back) with the write itself.
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        DO $$
+        DECLARE
+            tbl TEXT;
+        BEGIN
+            FOREACH tbl IN ARRAY ARRAY['cats', 'missions', 'targets', 'notes'] LOOP
+                EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tbl || '_version', tbl);
+                EXECUTE format(
+                    'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+                    'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()',
+                    tbl || '_version', tbl
+                );
+            END LOOP;
+        END
+        $$;
+    """),
+    (5, "summary tables for agency statistics", """
+        -- Counts by status, country and breed are hot rows that nearly every write would
+        -- change, so triggers only append delta rows here and readers sum them per key.
+        -- compact_stats() periodically folds the deltas into one row per key.
+        CREATE TABLE IF NOT EXISTS mission_status_stats (status status_type NOT NULL, missions BIGINT NOT NULL);
+        CREATE TABLE IF NOT EXISTS target_stats (country VARCHAR(255) NOT NULL, status status_type NOT NULL, targets BIGINT NOT NULL);
+        CREATE TABLE IF NOT EXISTS breed_stats (breed VARCHAR(255) NOT NULL, cats BIGINT NOT NULL, total_salary BIGINT NOT NULL);
+        -- Per-cat load is updated in place (only writers of the same cat meet) so the
+        -- busiest cats can be read from an index. Idle cats have no row.
+        CREATE TABLE IF NOT EXISTS cat_load_stats (cat_id INT PRIMARY KEY, active_missions BIGINT NOT NULL);
+        CREATE INDEX IF NOT EXISTS cat_load_stats_load_idx ON cat_load_stats (active_missions DESC, cat_id);
+    """ + stats_trigger_function("missions_stats", """
+                INSERT INTO mission_status_stats (status, missions)
+                SELECT status, sum(delta) FROM ({changes}) c GROUP BY status HAVING sum(delta) <> 0;
+                INSERT INTO cat_load_stats AS s (cat_id, active_missions)
+                SELECT assigned_cat, sum(delta) FROM ({changes}) c
+                WHERE assigned_cat IS NOT NULL AND status IN ('pending', 'in_progress')
+                GROUP BY assigned_cat HAVING sum(delta) <> 0 ORDER BY assigned_cat
+                ON CONFLICT (cat_id) DO UPDATE SET active_missions = s.active_missions + excluded.active_missions;
+                GET DIAGNOSTICS changed = ROW_COUNT;
+                IF changed > 0 THEN
+                    DELETE FROM cat_load_stats WHERE active_missions = 0;
+                END IF;
+    """) + stats_trigger_function("targets_stats", """
+                INSERT INTO target_stats (country, status, targets)
+                SELECT country, status, sum(delta) FROM ({changes}) c GROUP BY country, status HAVING sum(delta) <> 0;
+    """) + stats_trigger_function("cats_stats", """
+                INSERT INTO breed_stats (breed, cats, total_salary)
+                SELECT breed, sum(delta), sum(salary * delta) FROM ({changes}) c
+                GROUP BY breed HAVING sum(delta) <> 0 OR sum(salary * delta) <> 0;
+    """) + """
+        DO $$
+        DECLARE
+            tbl TEXT;
+        BEGIN
+            FOREACH tbl IN ARRAY ARRAY['cats', 'missions', 'targets'] LOOP
+                EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tbl || '_stats_insert', tbl);
+                EXECUTE format(
+                    'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+                    'FOR EACH STATEMENT EXECUTE FUNCTION %I()', tbl || '_stats_insert', tbl, tbl || '_stats'
+                );
+                EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tbl || '_stats_update', tbl);
+                EXECUTE format(
+                    'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+                    'FOR EACH STATEMENT EXECUTE FUNCTION %I()', tbl || '_stats_update', tbl, tbl || '_stats'
+                );
+                EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tbl || '_stats_delete', tbl);
+                EXECUTE format(
+                    'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+                    'FOR EACH STATEMENT EXECUTE FUNCTION %I()', tbl || '_stats_delete', tbl, tbl || '_stats'
+                );
+            END LOOP;
+        END
+        $$;
+
+        -- Folds the delta rows into one row per key. Writers only ever insert deltas, so
+        -- neither side waits for the other. The advisory lock (shared with rebuild_stats)
+        -- lets one worker compact at a time; the others skip.
+        CREATE OR REPLACE FUNCTION compact_stats() RETURNS void AS $$
+        BEGIN
+            IF NOT pg_try_advisory_xact_lock(7202506002) THEN
+                RETURN;
+            END IF;
+            WITH folded AS (DELETE FROM mission_status_stats RETURNING *)
+            INSERT INTO mission_status_stats (status, missions)
+            SELECT status, sum(missions) FROM folded GROUP BY status HAVING sum(missions) <> 0;
+            WITH folded AS (DELETE FROM target_stats RETURNING *)
+            INSERT INTO target_stats (country, status, targets)
+            SELECT country, status, sum(targets) FROM folded GROUP BY country, status HAVING sum(targets) <> 0;
+            WITH folded AS (DELETE FROM breed_stats RETURNING *)
+            INSERT INTO breed_stats (breed, cats, total_salary)
+            SELECT breed, sum(cats), sum(total_salary) FROM folded GROUP BY breed HAVING sum(cats) <> 0 OR sum(total_salary) <> 0;
+        END
+        $$ LANGUAGE plpgsql;
+
+        -- Recomputes every summary from the base tables. Writers wait until it commits;
+        -- readers keep seeing the old summaries until then.
+        CREATE OR REPLACE FUNCTION rebuild_stats() RETURNS void AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(7202506002);
+            LOCK TABLE cats, missions, targets IN SHARE MODE;
+            DELETE FROM mission_status_stats;
+            INSERT INTO mission_status_stats (status, missions) SELECT status, count(*) FROM missions GROUP BY status;
+            DELETE FROM target_stats;
+            INSERT INTO target_stats (country, status, targets) SELECT country, status, count(*) FROM targets GROUP BY country, status;
+            DELETE FROM breed_stats;
+            INSERT INTO breed_stats (breed, cats, total_salary) SELECT breed, count(*), sum(salary) FROM cats GROUP BY breed;
+            DELETE FROM cat_load_stats;
+            INSERT INTO cat_load_stats (cat_id, active_missions)
+            SELECT assigned_cat, count(*) FROM missions
+            WHERE assigned_cat IS NOT NULL AND status IN ('pending', 'in_progress') GROUP BY assigned_cat;
+        END
+        $$ LANGUAGE plpgsql;
+
+        SELECT rebuild_stats();
+    """),
+    (6, "full-text search on notes", """
+        -- Stored, so ranking reads the vector instead of parsing every matching message again.
+        -- Adding it rewrites notes once, holding an exclusive lock while it does.
+        ALTER TABLE notes ADD COLUMN IF NOT EXISTS search tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', message)) STORED;
+        CREATE INDEX IF NOT EXISTS notes_search_idx ON notes USING GIN (search);
+    """),
+    (7, "idempotency keys", """
+        -- status is NULL while the first request runs; expires_at is then its lease.
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            key TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            status INT,
+            headers JSONB,
+            body BYTEA,
+            expires_at TIMESTAMPTZ NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idempotency_keys_expires_idx ON idempotency_keys (expires_at);
+    """),
+    (8, "notes partitioned by month of created_at", """
+        -- Creates the monthly partitions (UTC months, named notes_YYYY_MM) from the current
+        -- month to months_ahead months later that do not exist yet, and returns how many.
+        CREATE OR REPLACE FUNCTION create_notes_partitions(months_ahead INT) RETURNS INT AS $$
+        DECLARE
+            first_day TIMESTAMP;
+            part TEXT;
+            created INT := 0;
+        BEGIN
+            FOR first_day IN
+                SELECT generate_series(0, months_ahead) * interval '1 month' + date_trunc('month', now() AT TIME ZONE 'UTC')
+            LOOP
+                part := 'notes_' || to_char(first_day, 'YYYY_MM');
+                CONTINUE WHEN to_regclass(part) IS NOT NULL;
+                -- Workers run this concurrently; only one may create a partition.
+                PERFORM pg_advisory_xact_lock(7202506022);
+                CONTINUE WHEN to_regclass(part) IS NOT NULL;
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF notes FOR VALUES FROM (%L) TO (%L)',
+                    part, first_day || '+00', first_day + interval '1 month' || '+00'
+                );
+                created := created + 1;
+            END LOOP;
+            RETURN created;
+        END
+        $$ LANGUAGE plpgsql;
+
+        -- Existing notes have no creation time; they are dated at the migration and land in
+        -- the current month. The id sequence moves over to the new table.
+        ALTER SEQUENCE notes_id_seq OWNED BY NONE;
+        ALTER TABLE notes RENAME TO notes_unpartitioned;
+        CREATE TABLE notes (
+            id INT NOT NULL DEFAULT nextval('notes_id_seq'),
+            target_id INT NOT NULL,
+            message VARCHAR(255) NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            search tsvector GENERATED ALWAYS AS (to_tsvector('english', message)) STORED
+        ) PARTITION BY RANGE (created_at);
+        ALTER SEQUENCE notes_id_seq OWNED BY notes.id;
+        SELECT create_notes_partitions(1);
+        INSERT INTO notes (id, target_id, message) SELECT id, target_id, message FROM notes_unpartitioned;
+        DROP TABLE notes_unpartitioned;
+
+        -- Built after the copy, and once per partition. Lists page by (created_at, id), so
+        -- a page after a cursor only reads the partitions from the cursor's month on.
+        ALTER TABLE notes ADD PRIMARY KEY (id, created_at);
+        ALTER TABLE notes ADD FOREIGN KEY (target_id) REFERENCES targets (id);
+        CREATE INDEX notes_created_at_idx ON notes (created_at, id);
+        CREATE INDEX notes_target_id_idx ON notes (target_id, created_at, id);
+        CREATE INDEX notes_search_idx ON notes USING GIN (search);
+        CREATE TRIGGER notes_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON notes
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+    """),
+    (9, "active mission count on cats for availability ranking", """
+        -- Each cat's load moves from cat_load_stats onto the cat itself, so available cats
+        -- are ranked straight from an index and an auto-assignment that locks a cat with
+        -- FOR UPDATE SKIP LOCKED sees a load committed meanwhile when the row is rechecked.
+        ALTER TABLE cats ADD COLUMN IF NOT EXISTS active_missions INT NOT NULL DEFAULT 0;
+        UPDATE cats SET active_missions = l.active_missions FROM cat_load_stats l WHERE l.cat_id = cats.id;
+        DROP TABLE cat_load_stats;
+        CREATE INDEX IF NOT EXISTS cats_ranking_idx ON cats (active_missions, years_of_experience DESC, salary, id);
+        CREATE INDEX IF NOT EXISTS cats_busiest_idx ON cats (active_missions DESC, id) WHERE active_missions > 0;
+    """ + stats_trigger_function("missions_stats", """
+                INSERT INTO mission_status_stats (status, missions)
+                SELECT status, sum(delta) FROM ({changes}) c GROUP BY status HAVING sum(delta) <> 0;
+                -- Cats are locked in id order first, so concurrent writers cannot deadlock.
+                PERFORM 1 FROM cats WHERE id IN (
+                    SELECT assigned_cat FROM ({changes}) c WHERE status IN ('pending', 'in_progress')
+                ) ORDER BY id FOR NO KEY UPDATE;
+                UPDATE cats SET active_missions = cats.active_missions + l.delta FROM (
+                    SELECT assigned_cat, sum(delta) AS delta FROM ({changes}) c
+                    WHERE assigned_cat IS NOT NULL AND status IN ('pending', 'in_progress')
+                    GROUP BY assigned_cat HAVING sum(delta) <> 0
+                ) l WHERE cats.id = l.assigned_cat;
+    """) + """
+        -- Those updates only move active_missions: they change neither the cats the API
+        -- returns (so no new ETag) nor the breed statistics.
+        DROP TRIGGER IF EXISTS cats_version ON cats;
+        CREATE TRIGGER cats_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON cats
+            FOR EACH STATEMENT WHEN (pg_trigger_depth() < 1) EXECUTE FUNCTION bump_table_version();
+        DROP TRIGGER IF EXISTS cats_stats_update ON cats;
+        CREATE TRIGGER cats_stats_update AFTER UPDATE ON cats REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT WHEN (pg_trigger_depth() < 1) EXECUTE FUNCTION cats_stats();
+
+        CREATE OR REPLACE FUNCTION rebuild_stats() RETURNS void AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(7202506002);
+            LOCK TABLE cats, missions, targets IN SHARE MODE;
+            DELETE FROM mission_status_stats;
+            INSERT INTO mission_status_stats (status, missions) SELECT status, count(*) FROM missions GROUP BY status;
+            DELETE FROM target_stats;
+            INSERT INTO target_stats (country, status, targets) SELECT country, status, count(*) FROM targets GROUP BY country, status;
+            DELETE FROM breed_stats;
+            INSERT INTO breed_stats (breed, cats, total_salary) SELECT breed, count(*), sum(salary) FROM cats GROUP BY breed;
+            UPDATE cats SET active_missions = l.active_missions FROM (
+                SELECT c.id, count(m.id) AS active_missions FROM cats c
+                LEFT JOIN missions m ON m.assigned_cat = c.id AND m.status IN ('pending', 'in_progress')
+                GROUP BY c.id
+            ) l WHERE cats.id = l.id AND cats.active_missions <> l.active_missions;
+        END
+        $$ LANGUAGE plpgsql;
+    """),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+async def current_version(conn) -> int:
+    try:
+        return await conn.fetchval("SELECT max(version) FROM schema_version") or 0
+    except asyncpg.UndefinedTableError:
+        return 0
+
+
+async def migrate(pool) -> bool:
+    """Bring the schema up to LATEST_VERSION. A no-op single query when it already is.
+
+    Returns whether the schema was behind on entry (even if another worker migrated it
+    while this one waited for the lock), i.e. whether existing connections predate it.
+    """
+    async with pool.acquire() as conn:
+        if await current_version(conn) >= LATEST_VERSION:
+            return False
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+            await conn.execute(
+                "CREATE TABLE IF NOT EXISTS schema_version (version INT PRIMARY KEY, description TEXT NOT NULL, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+            )
+            version = await current_version(conn)
+            for step, description, query in MIGRATIONS:
+                if step <= version:
+                    continue
+                logger.info("Applying migration %s: %s", step, description)
+                await conn.execute(query)
+                await conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES ($1, $2)", step, description
+                )
+    return True
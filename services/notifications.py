@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+NotificationHandler = Callable[[str], None]
+ReconnectHandler = Callable[[], Awaitable[None]]
+
+RECONNECT_DELAY_SECONDS = 1.0
+MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+
+class NotificationListener:
+    """One dedicated LISTEN connection per worker, reconnected with backoff when it drops.
+
+    Notifications can be lost while disconnected, so reconnect handlers are awaited after
+    every reconnection to let subscribers resynchronise (drop caches, replay events, ...).
+    """
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._handlers: Dict[str, List[NotificationHandler]] = {}
+        self._reconnect_handlers: List[ReconnectHandler] = []
+        self._conn: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def subscribe(self, channel: str, handler: NotificationHandler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_reconnect(self, handler: ReconnectHandler):
+        self._reconnect_handlers.append(handler)
+
+    async def start(self):
+        await self._connect()
+
+    async def stop(self):
+        self._closed = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        if self._conn and not self._conn.is_closed():
+            await self._conn.close()
+
+    async def _connect(self):
+        self._conn = await asyncpg.connect(self.dsn)
+        self._conn.add_termination_listener(self._on_termination)
+        for channel in self._handlers:
+            await self._conn.add_listener(channel, self._dispatch)
+
+    def _dispatch(self, conn, pid, channel, payload):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("Notification handler for %s failed", channel)
+
+    def _on_termination(self, conn):
+        if not self._closed and self._reconnect_task is None:
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self):
+        delay = RECONNECT_DELAY_SECONDS
+        try:
+            while not self._closed:
+                try:
+                    await self._connect()
+                    break
+                except (OSError, asyncpg.PostgresError) as e:
+                    logger.warning("LISTEN connection lost, retrying in %.0fs: %s", delay, e)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+            for handler in self._reconnect_handlers:
+                await handler()
+        finally:
+            self._reconnect_task = None
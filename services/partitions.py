@@ -0,0 +1,113 @@
+"""Monthly partitions of the notes table: creation ahead of time and archival.
+
+Run ``python -m services.partitions create`` to create the partitions for the current
+month and the next NOTES_PARTITIONS_AHEAD months (workers also do this at startup and
+every minute). ``python -m services.partitions archive`` detaches every partition older
+than NOTES_RETENTION_MONTHS full months, writes its rows to
+``NOTES_ARCHIVE_DIR/notes_YYYY_MM.csv.gz`` and drops it. A run interrupted half way is
+finished by the next one.
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import re
+import sys
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+import asyncpg
+
+from constants.keys import KEYS
+
+PARTITION_NAME = re.compile(r"^notes_(\d{4})_(\d{2})$")
+ARCHIVE_COLUMNS = ["id", "target_id", "message", "created_at"]
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = PARTITION_NAME.match(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def retention_cutoff(months: int, today: date = None) -> date:
+    """First day of the oldest month kept; partitions for earlier months are archived."""
+    today = today or datetime.now(timezone.utc).date()
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def create_partitions(conn, months_ahead: int = KEYS["NOTES_PARTITIONS_AHEAD"]) -> int:
+    return await conn.fetchval("SELECT create_notes_partitions($1)", months_ahead)
+
+
+async def _detach(conn, name: str, pending: bool):
+    # CONCURRENTLY keeps reads and writes on notes going; it cannot run in a transaction
+    # and, if interrupted, leaves the partition pending until FINALIZE.
+    mode = "FINALIZE" if pending else "CONCURRENTLY"
+    await conn.execute(f'ALTER TABLE notes DETACH PARTITION "{name}" {mode}')
+    # Detaching is not a write to notes, so it does not fire the version trigger.
+    await conn.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = 'notes'")
+
+
+async def _dump(conn, name: str, directory: str) -> str:
+    path = os.path.join(directory, f"{name}.csv.gz")
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wb") as f:
+
+        async def write(data):
+            f.write(data)
+
+        await conn.copy_from_table(name, columns=ARCHIVE_COLUMNS, output=write, format="csv", header=True)
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+async def archive_partitions(conn, retention_months: int = KEYS["NOTES_RETENTION_MONTHS"], directory: str = KEYS["NOTES_ARCHIVE_DIR"]) -> List[str]:
+    """Detach, dump and drop the partitions before the retention window; returns the files written."""
+    cutoff = retention_cutoff(retention_months)
+    attached = await conn.fetch("""
+        SELECT c.relname AS name, i.inhdetachpending AS pending
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'notes'::regclass
+    """)
+    # Detached by an earlier run that stopped before dropping them.
+    detached = await conn.fetch("""
+        SELECT relname AS name FROM pg_class
+        WHERE relkind = 'r' AND NOT relispartition AND relnamespace = 'public'::regnamespace AND relname ~ '^notes_[0-9]{4}_[0-9]{2}$'
+    """)
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for name, pending in sorted([(row["name"], row["pending"]) for row in attached] + [(row["name"], None) for row in detached]):
+        month = partition_month(name)
+        if month is None or month >= cutoff:
+            continue
+        if pending is not None:
+            await _detach(conn, name, pending)
+        written.append(await _dump(conn, name, directory))
+        await conn.execute(f'DROP TABLE "{name}"')
+    return written
+
+
+async def run(command: str):
+    conn = await asyncpg.connect(KEYS["DATABASE_URL"])
+    try:
+        if command == "create":
+            print(f"created {await create_partitions(conn)} partitions")
+        else:
+            for path in await archive_partitions(conn):
+                print(f"archived {path}")
+    finally:
+        await conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("create", "archive"))
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.command))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+import asyncpg
+
+from constants.keys import KEYS
+
+logger = logging.getLogger(__name__)
+
+class PoolExhaustedError(Exception):
+    """No pooled connection became free within DB_POOL_ACQUIRE_TIMEOUT."""
+
+
+# Connections each worker holds outside its pool: the LISTEN connection of NotificationListener.
+CONNECTIONS_OUTSIDE_POOL = 1
+
+
+def worker_pool_size(budget: int, workers: int) -> int:
+    """Largest pool per worker that keeps workers processes within budget connections to a server."""
+    size = budget // workers - CONNECTIONS_OUTSIDE_POOL
+    if size < 1:
+        raise ValueError(f"DB_CONNECTION_BUDGET={budget} leaves no pooled connections for {workers} workers")
+    return size
+
+
+def pool_settings() -> dict:
+    """Pool options from the environment. With DB_CONNECTION_BUDGET set, the pool size is
+    capped at this worker's share of it, by WEB_CONCURRENCY (one process when unset)."""
+    max_size = KEYS["DB_POOL_MAX_SIZE"]
+    if KEYS["DB_CONNECTION_BUDGET"] > 0:
+        try:
+            max_size = min(max_size, worker_pool_size(KEYS["DB_CONNECTION_BUDGET"], KEYS["WEB_CONCURRENCY"] or 1))
+        except ValueError as e:
+            logger.warning("%s; using a single pooled connection", e)
+            max_size = 1
+    return {
+        "min_size": min(KEYS["DB_POOL_MIN_SIZE"], max_size),
+        "max_size": max_size,
+        "command_timeout": KEYS["DB_COMMAND_TIMEOUT"],
+        "statement_cache_size": KEYS["DB_STATEMENT_CACHE_SIZE"],
+        "max_queries": KEYS["DB_POOL_MAX_QUERIES"],
+        "max_inactive_connection_lifetime": KEYS["DB_MAX_INACTIVE_CONNECTION_LIFETIME"],
+    }
+
+
+class MeteredPool:
+    """asyncpg pool wrapper that bounds acquire waits and records saturation metrics."""
+
+    def __init__(self, pool: asyncpg.Pool, acquire_timeout: float = KEYS["DB_POOL_ACQUIRE_TIMEOUT"]):
+        self._pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.waiting = 0
+        self.acquires = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @classmethod
+    async def create(cls, dsn: str, **kwargs) -> "MeteredPool":
+        return cls(await asyncpg.create_pool(dsn, **pool_settings(), **kwargs))
+
+    @asynccontextmanager
+    async def acquire(self):
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            conn = await self._pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise PoolExhaustedError("Database connection pool exhausted")
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.acquires += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        try:
+            yield conn
+        finally:
+            await self._pool.release(conn)
+
+    async def execute(self, query: str, *args):
+        async with self.acquire() as conn:
+            return await conn.execute(query, *args)
+
+    async def fetch(self, query: str, *args):
+        async with self.acquire() as conn:
+            return await conn.fetch(query, *args)
+
+    async def fetchrow(self, query: str, *args):
+        async with self.acquire() as conn:
+            return await conn.fetchrow(query, *args)
+
+    async def fetchval(self, query: str, *args):
+        async with self.acquire() as conn:
+            return await conn.fetchval(query, *args)
+
+    async def expire_connections(self):
+        """Replace every pooled connection (released ones are closed, busy ones when released)."""
+        await self._pool.expire_connections()
+
+    async def close(self):
+        await self._pool.close()
+
+    def stats(self) -> dict:
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return {
+            "size": size,
+            "max_size": self._pool.get_max_size(),
+            "in_use": size - idle,
+            "idle": idle,
+            "waiting": self.waiting,
+            "acquires": self.acquires,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
@@ -0,0 +1,306 @@
+import logging
+from typing import Dict
+
+import asyncpg
+
+from models.models import StatusType
+
+logger = logging.getLogger(__name__)
+
+CAT_COLUMNS = "id, name, years_of_experience, breed, salary"
+MISSION_COLUMNS = "id, assigned_cat, status, title"
+TARGET_COLUMNS = "id, assigned_mission, status, name, country"
+NOTE_COLUMNS = "id, target_id, message, created_at"
+
+EXPORT_COLUMNS = {"cats": CAT_COLUMNS, "missions": MISSION_COLUMNS, "targets": TARGET_COLUMNS, "notes": NOTE_COLUMNS}
+
+
+def mission_tree_sql(include_notes: bool) -> str:
+    """SQL expression rendering mission m with its targets (and their notes) as JSON text."""
+    notes = """, 'notes', (
+                SELECT coalesce(json_agg(json_build_object(
+                    'id', n.id, 'target_id', n.target_id, 'message', n.message, 'created_at', n.created_at
+                ) ORDER BY n.id), '[]'::json)
+                FROM notes n WHERE n.target_id = t.id
+            )""" if include_notes else ""
+    return f"""json_build_object(
+            'id', m.id, 'assigned_cat', m.assigned_cat, 'status', m.status, 'title', m.title,
+            'targets', (
+                SELECT coalesce(json_agg(json_build_object(
+                    'id', t.id, 'assigned_mission', t.assigned_mission, 'status', t.status, 'name', t.name, 'country', t.country{notes}
+                ) ORDER BY t.id), '[]'::json)
+                FROM targets t WHERE t.assigned_mission = m.id
+            )
+        )::text"""
+
+
+# Statements run on every request path. QueryRegistry prepares them once per pooled
+# connection, so executing them skips parsing from the first call.
+QUERIES: Dict[str, str] = {
+    "insert_cat": f"""
+        INSERT INTO cats (name, years_of_experience, breed, salary) VALUES ($1, $2, $3, $4)
+        RETURNING {CAT_COLUMNS}
+    """,
+    # The table version is read in the same snapshot as the row, for EntityCache.
+    "get_cat": f"SELECT {CAT_COLUMNS}, (SELECT version FROM table_versions WHERE table_name = 'cats') AS version FROM cats WHERE id = $1",
+    "list_cats": f"SELECT {CAT_COLUMNS} FROM cats WHERE id > $1 ORDER BY id LIMIT $2",
+    "list_cats_by_breed": f"SELECT {CAT_COLUMNS} FROM cats WHERE id > $1 AND breed = $2 ORDER BY id LIMIT $3",
+    "available_cats": f"""
+        SELECT {CAT_COLUMNS}, active_missions FROM cats WHERE active_missions < $1
+        ORDER BY active_missions, years_of_experience DESC, salary, id LIMIT $2
+    """,
+    # The best ranked cat that no other assignment holds. A cat whose load was raised
+    # since this statement's snapshot is rechecked against $2 once locked.
+    "auto_assign_cat": f"""
+        WITH mission AS (
+            SELECT id, assigned_cat, status FROM missions WHERE id = $1 FOR UPDATE
+        ),
+        cat AS (
+            SELECT {CAT_COLUMNS}, active_missions FROM cats
+            WHERE active_missions < $2 AND (SELECT assigned_cat IS NULL FROM mission)
+            ORDER BY active_missions, years_of_experience DESC, salary, id
+            LIMIT 1 FOR UPDATE SKIP LOCKED
+        ),
+        assigned AS (
+            UPDATE missions SET assigned_cat = cat.id FROM cat WHERE missions.id = $1 RETURNING missions.status
+        )
+        SELECT EXISTS (SELECT 1 FROM mission) AS mission_exists, (SELECT assigned_cat FROM mission) AS current_cat,
+               cat.id, cat.name, cat.years_of_experience, cat.breed, cat.salary,
+               cat.active_missions + (SELECT count(*) FROM assigned WHERE status IN ('pending', 'in_progress')) AS active_missions
+        FROM (SELECT 1) one LEFT JOIN cat ON true
+    """,
+    "update_cat_salary": "UPDATE cats SET salary = $1 WHERE id = $2 RETURNING id",
+    "delete_cat": """
+        WITH deleted AS (
+            DELETE FROM cats WHERE id = $1 AND NOT EXISTS (SELECT 1 FROM missions WHERE assigned_cat = $1)
+            RETURNING id
+        )
+        SELECT EXISTS (SELECT 1 FROM deleted) AS deleted,
+               EXISTS (SELECT 1 FROM missions WHERE assigned_cat = $1) AS assigned
+    """,
+    "insert_mission": "INSERT INTO missions (assigned_cat, status, title) VALUES ($1, $2, $3) RETURNING id",
+    "get_mission": f"SELECT {MISSION_COLUMNS}, (SELECT version FROM table_versions WHERE table_name = 'missions') AS version FROM missions WHERE id = $1",
+    "get_mission_tree": f"SELECT {mission_tree_sql(False)} FROM missions m WHERE m.id = $1",
+    "get_mission_tree_with_notes": f"SELECT {mission_tree_sql(True)} FROM missions m WHERE m.id = $1",
+    # Every statement that writes a mission and its targets locks the mission row first
+    # and its targets after it (delete_mission, update_target_status, update_target_statuses);
+    # opposite orders would deadlock a delete against the last target being finished.
+    "delete_mission": """
+        WITH mission AS (
+            SELECT id, assigned_cat FROM missions WHERE id = $1 FOR UPDATE
+        ),
+        cancelled_targets AS (
+            UPDATE targets SET status = 'cancelled'
+            WHERE assigned_mission = (SELECT id FROM mission WHERE assigned_cat IS NULL)
+        ),
+        cancelled AS (
+            UPDATE missions SET status = 'cancelled'
+            WHERE id = (SELECT id FROM mission WHERE assigned_cat IS NULL)
+        )
+        SELECT EXISTS (SELECT 1 FROM mission) AS found, (SELECT assigned_cat FROM mission) AS assigned_cat
+    """,
+    "assign_cat_to_mission": """
+        WITH assigned AS (
+            UPDATE missions SET assigned_cat = $2
+            WHERE id = $1 AND assigned_cat IS NULL AND EXISTS (SELECT 1 FROM cats WHERE id = $2)
+            RETURNING id
+        )
+        SELECT EXISTS (SELECT 1 FROM cats WHERE id = $2) AS cat_exists,
+               EXISTS (SELECT 1 FROM missions WHERE id = $1) AS mission_exists,
+               EXISTS (SELECT 1 FROM assigned) AS assigned
+    """,
+    # The mission, then its targets in id order, are locked before anything is written,
+    # so two requests finishing the last targets of a mission cannot both miss the recompute.
+    "update_target_status": """
+        WITH mission AS (
+            SELECT id FROM missions
+            WHERE id = (SELECT assigned_mission FROM targets WHERE id = $2)
+            FOR UPDATE
+        ),
+        siblings AS (
+            SELECT t.id, t.status FROM targets t
+            WHERE t.assigned_mission = (SELECT id FROM mission)
+            ORDER BY t.id
+            FOR UPDATE
+        ),
+        updated AS (
+            UPDATE targets SET status = $1
+            WHERE id = $2 AND (SELECT count(*) FROM siblings) > 0
+            RETURNING assigned_mission
+        ),
+        finished AS (
+            UPDATE missions SET status = 'finished'
+            WHERE id = (SELECT assigned_mission FROM updated)
+              AND $1 = 'finished'::status_type
+              AND NOT EXISTS (SELECT 1 FROM siblings WHERE id <> $2 AND status <> 'finished')
+        )
+        SELECT assigned_mission FROM updated
+    """,
+    # The batch form of update_target_status. The last change of a target in the batch wins.
+    # The affected missions, then all their targets, are locked in id order first, then each
+    # mission is finished at most once, from the statuses its targets end up with.
+    "update_target_statuses": """
+        WITH changes AS (
+            SELECT DISTINCT ON (target_id) target_id, status
+            FROM unnest($1::int[], $2::status_type[]) WITH ORDINALITY AS c (target_id, status, position)
+            ORDER BY target_id, position DESC
+        ),
+        locked_missions AS (
+            SELECT id FROM missions
+            WHERE id IN (SELECT assigned_mission FROM targets WHERE id IN (SELECT target_id FROM changes))
+            ORDER BY id
+            FOR UPDATE
+        ),
+        siblings AS (
+            SELECT t.id, t.assigned_mission, t.status FROM targets t
+            WHERE t.assigned_mission IN (SELECT id FROM locked_missions)
+            ORDER BY t.id
+            FOR UPDATE
+        ),
+        updated AS (
+            UPDATE targets t SET status = c.status
+            FROM changes c
+            WHERE t.id = c.target_id AND (SELECT count(*) FROM siblings) > 0
+            RETURNING t.id, t.assigned_mission
+        ),
+        finished AS (
+            UPDATE missions SET status = 'finished'
+            WHERE id IN (
+                SELECT s.assigned_mission FROM siblings s LEFT JOIN changes c ON c.target_id = s.id
+                GROUP BY s.assigned_mission
+                HAVING bool_or(c.status = 'finished') AND bool_and(coalesce(c.status, s.status) = 'finished')
+            )
+        )
+        SELECT c.target_id, u.assigned_mission FROM changes c LEFT JOIN updated u ON u.id = c.target_id
+    """,
+    "target_statuses_for_share": "SELECT id, status FROM targets WHERE id = ANY($1::int[]) FOR SHARE",
+    "insert_note": """
+        WITH target AS (
+            SELECT id, status FROM targets WHERE id = $1 FOR SHARE
+        ),
+        inserted AS (
+            INSERT INTO notes (target_id, message)
+            SELECT id, $2 FROM target WHERE status NOT IN ('finished', 'cancelled')
+            RETURNING id
+        )
+        SELECT (SELECT status FROM target) AS target_status, (SELECT id FROM inserted) AS note_id
+    """,
+    # $1 repeats the lower bound on created_at alone, which (unlike the row comparison)
+    # lets the executor skip the partitions before it.
+    "list_notes": f"""
+        SELECT {NOTE_COLUMNS} FROM notes WHERE created_at >= $1 AND (created_at, id) > ($2, $3)
+        ORDER BY created_at, id LIMIT $4
+    """,
+    "list_notes_by_target": f"""
+        SELECT {NOTE_COLUMNS} FROM notes WHERE created_at >= $1 AND (created_at, id) > ($2, $3) AND target_id = $4
+        ORDER BY created_at, id LIMIT $5
+    """,
+    "table_versions": "SELECT table_name, version FROM table_versions WHERE table_name = ANY($1::text[])",
+    "stats": """
+        SELECT json_build_object(
+            'missions_by_status', (
+                SELECT json_object_agg(s.status, coalesce(m.missions, 0) ORDER BY s.status)
+                FROM unnest(enum_range(NULL::status_type)) AS s (status)
+                LEFT JOIN (SELECT status, sum(missions) AS missions FROM mission_status_stats GROUP BY status) m USING (status)
+            ),
+            'targets_by_country', (
+                SELECT coalesce(json_object_agg(country, statuses ORDER BY country), '{}'::json) FROM (
+                    SELECT country, json_object_agg(status, targets ORDER BY status) AS statuses FROM (
+                        SELECT country, status, sum(targets) AS targets FROM target_stats GROUP BY country, status
+                    ) t WHERE targets > 0 GROUP BY country
+                ) c
+            ),
+            'salary_by_breed', (
+                SELECT coalesce(json_object_agg(breed, json_build_object(
+                    'cats', cats, 'total_salary', total_salary, 'average_salary', round(total_salary / cats, 2)
+                ) ORDER BY breed), '{}'::json) FROM (
+                    SELECT breed, sum(cats) AS cats, sum(total_salary) AS total_salary FROM breed_stats GROUP BY breed
+                ) b WHERE cats > 0
+            ),
+            'busiest_cats', (
+                SELECT coalesce(json_agg(json_build_object('cat_id', id, 'active_missions', active_missions) ORDER BY active_missions DESC, id), '[]'::json)
+                FROM (SELECT id, active_missions FROM cats WHERE active_missions > 0 ORDER BY active_missions DESC, id LIMIT $1) l
+            )
+        )::text
+    """,
+    "compact_stats": "SELECT compact_stats()",
+    "create_notes_partitions": "SELECT create_notes_partitions($1)",
+    "get_idempotency_key": "SELECT fingerprint, status, headers, body FROM idempotency_keys WHERE key = $1 AND expires_at > now()",
+    # Takes over a key only once it has expired, or its first request's lease ran out.
+    "claim_idempotency_key": """
+        INSERT INTO idempotency_keys (key, fingerprint, expires_at) VALUES ($1, $2, now() + make_interval(secs => $3))
+        ON CONFLICT (key) DO UPDATE
+        SET fingerprint = EXCLUDED.fingerprint, status = NULL, headers = NULL, body = NULL, expires_at = EXCLUDED.expires_at
+        WHERE idempotency_keys.expires_at <= now()
+        RETURNING key
+    """,
+    "save_idempotent_response": """
+        UPDATE idempotency_keys SET status = $2, headers = $3, body = $4, expires_at = now() + make_interval(secs => $5)
+        WHERE key = $1 AND status IS NULL
+    """,
+    "release_idempotency_key": "DELETE FROM idempotency_keys WHERE key = $1 AND status IS NULL",
+    "purge_idempotency_keys": "DELETE FROM idempotency_keys WHERE expires_at <= now()",
+    # Takes the oldest ids from the primary key, so it stays cheap when nothing has expired.
+    "purge_mission_events": """
+        WITH purged AS (
+            DELETE FROM mission_events
+            WHERE id IN (SELECT id FROM mission_events ORDER BY id LIMIT $2)
+              AND created_at < now() - make_interval(secs => $1)
+            RETURNING 1
+        )
+        SELECT count(*) FROM purged
+    """,
+    "reserve_ids": "SELECT nextval(pg_get_serial_sequence($1, 'id')) FROM generate_series(1, $2)",
+}
+
+
+def _encode_status(value) -> bytes:
+    return StatusType(value).value.encode()
+
+
+def _decode_status(data: bytes) -> StatusType:
+    return StatusType(data.decode())
+
+
+async def register_status_codec(conn):
+    """Exchange status_type as StatusType members. The binary form of an enum is its label,
+    which also keeps binary COPY (copy_records_to_table) working."""
+    await conn.set_type_codec(
+        "status_type", schema="public", encoder=_encode_status, decoder=_decode_status, format="binary"
+    )
+
+
+class QueryRegistry:
+    """Named statements, prepared on every pooled connection as soon as it is opened.
+
+    They are prepared into asyncpg's per-connection statement cache, which outlives
+    each acquire (a PreparedStatement object does not). Calls by name therefore reuse
+    the server-side statement from the first request on, and asyncpg re-prepares it
+    by itself if a migration changes a table underneath.
+    """
+
+    def __init__(self, queries: Dict[str, str] = QUERIES):
+        self.queries = queries
+
+    async def init_connection(self, conn):
+        """Pool init hook: register codecs and prepare every statement."""
+        try:
+            await register_status_codec(conn)
+        except ValueError:
+            # status_type is created by the first migration; the pool is recycled after migrating.
+            return
+        for name, query in self.queries.items():
+            try:
+                # With no argument rows this prepares (and caches) the statement without running it.
+                await conn.executemany(query, [])
+            except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError, asyncpg.UndefinedFunctionError):
+                logger.debug("Not preparing %s before the schema is migrated", name)
+
+    async def fetch(self, conn, name: str, *args):
+        return await conn.fetch(self.queries[name], *args)
+
+    async def fetchrow(self, conn, name: str, *args):
+        return await conn.fetchrow(self.queries[name], *args)
+
+    async def fetchval(self, conn, name: str, *args):
+        return await conn.fetchval(self.queries[name], *args)
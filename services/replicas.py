@@ -0,0 +1,176 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+import asyncpg
+
+from constants.keys import KEYS
+from services.pool import MeteredPool, PoolExhaustedError
+
+logger = logging.getLogger(__name__)
+
+# A replica raising one of these is taken out of rotation until a health check passes.
+REPLICA_DOWN_ERRORS = (
+    OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError,
+    asyncpg.OperatorInterventionError, asyncpg.TooManyConnectionsError,
+)
+# These only send the read to the primary: the replica is busy, or cancelled the query
+# because it conflicted with replaying the primary's changes.
+REPLICA_RETRY_ERRORS = (PoolExhaustedError, asyncpg.SerializationError)
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+UNSAFE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+# Server chosen for the current request's reads, and whether it must be the primary.
+_read_pool: contextvars.ContextVar[Optional[MeteredPool]] = contextvars.ContextVar("read_pool", default=None)
+_read_primary: contextvars.ContextVar[bool] = contextvars.ContextVar("read_primary", default=False)
+
+
+class _Replica:
+    def __init__(self, name: str, dsn: str):
+        self.name = name
+        self.dsn = dsn
+        self.pool: Optional[MeteredPool] = None
+        self.healthy = False
+        self.failures = 0
+
+
+class ReplicaSet:
+    """Pools on read replicas, handed out round-robin for reads.
+
+    A request reads from one server throughout (the first read picks it), so the ETag
+    versions and the rows of a response come from the same snapshot history. A
+    replica that fails a read or a health check is skipped until a check passes;
+    with none left, reads go to the primary.
+    """
+
+    def __init__(self, primary: MeteredPool, dsns: List[str], check_interval: float = KEYS["DB_REPLICA_CHECK_INTERVAL"]):
+        self.primary = primary
+        self.replicas = [_Replica(f"replica{index}", dsn) for index, dsn in enumerate(dsns)]
+        self.check_interval = check_interval
+        self._init: Optional[Callable[[asyncpg.Connection], Awaitable[None]]] = None
+        self._next = itertools.cycle(self.replicas)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, init: Callable[[asyncpg.Connection], Awaitable[None]] = None):
+        self._init = init
+        await self._check_all()
+        self._task = asyncio.create_task(self._check_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for replica in self.replicas:
+            if replica.pool:
+                await replica.pool.close()
+                replica.pool = None
+
+    def read_pool(self) -> MeteredPool:
+        """The pool this request reads from; picked on the first read of the request."""
+        pool = _read_pool.get()
+        if pool is None:
+            pool = self._pick()
+            _read_pool.set(pool)
+        return pool
+
+    def _pick(self) -> MeteredPool:
+        if _read_primary.get():
+            return self.primary
+        for _ in range(len(self.replicas)):
+            replica = next(self._next)
+            if replica.healthy and replica.pool:
+                return replica.pool
+        return self.primary
+
+    def failed(self, pool: MeteredPool, error: Exception):
+        """Send the rest of this request to the primary, and drop the replica if it is down."""
+        _read_pool.set(self.primary)
+        if isinstance(error, REPLICA_RETRY_ERRORS):
+            return
+        for replica in self.replicas:
+            if replica.pool is pool and replica.healthy:
+                replica.healthy = False
+                replica.failures += 1
+                logger.warning("Read replica %s failed, reading from the primary: %r", replica.name, error)
+
+    async def _check_loop(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self._check_all()
+
+    async def _check_all(self):
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: _Replica):
+        try:
+            if replica.pool is None:
+                replica.pool = await asyncio.wait_for(
+                    MeteredPool.create(replica.dsn, init=self._init), self.check_interval
+                )
+            await asyncio.wait_for(replica.pool.fetchval("SELECT 1"), self.check_interval)
+        except Exception as e:
+            if replica.healthy or replica.failures == 0:
+                logger.warning("Read replica %s is unavailable: %r", replica.name, e)
+            replica.healthy = False
+            replica.failures += 1
+            return
+        if not replica.healthy:
+            logger.info("Read replica %s is available", replica.name)
+        replica.healthy = True
+
+    def stats(self) -> dict:
+        return {
+            replica.name: {"healthy": replica.healthy, "failures": replica.failures, **(replica.pool.stats() if replica.pool else {})}
+            for replica in self.replicas
+        }
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware that sends a client's reads to the primary for a while after it writes.
+
+    A successful POST, PUT, PATCH or DELETE sets a cookie holding the time until which the
+    client's reads skip the replicas (READ_YOUR_WRITES_SECONDS), long enough for them to
+    replay the write. Every request also starts with no read server chosen.
+    """
+
+    def __init__(self, app, window: float = KEYS["READ_YOUR_WRITES_SECONDS"]):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        pool_token = _read_pool.set(None)
+        primary_token = _read_primary.set(self._read_primary_until(scope) > time.time())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and scope["method"] in UNSAFE_METHODS and message["status"] < 400:
+                until = time.time() + self.window
+                cookie = f"{READ_PRIMARY_COOKIE}={until:.3f}; Max-Age={int(self.window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _read_primary.reset(primary_token)
+            _read_pool.reset(pool_token)
+
+    @staticmethod
+    def _read_primary_until(scope) -> float:
+        for name, value in scope["headers"]:
+            if name != b"cookie":
+                continue
+            for part in value.decode("latin-1").split(";"):
+                key, _, until = part.strip().partition("=")
+                if key == READ_PRIMARY_COOKIE:
+                    try:
+                        return float(until)
+                    except ValueError:
+                        return 0.0
+        return 0.0
@@ -0,0 +1,37 @@
+"""Maintenance of the summary tables behind ``GET /stats``.
+
+Run ``python -m services.stats rebuild`` to recompute them from cats, missions and
+targets, e.g. after restoring a backup or editing rows by hand with the triggers
+disabled. Writes wait while it runs; ``GET /stats`` keeps answering from the old
+summaries until it commits. ``python -m services.stats compact`` folds pending delta
+rows right away instead of waiting for a worker to do it.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import asyncpg
+
+from constants.keys import KEYS
+
+
+async def run(command: str):
+    conn = await asyncpg.connect(KEYS["DATABASE_URL"])
+    try:
+        started = time.perf_counter()
+        await conn.execute("SELECT rebuild_stats()" if command == "rebuild" else "SELECT compact_stats()")
+        print(f"{command} finished in {time.perf_counter() - started:.3f}s")
+    finally:
+        await conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("rebuild", "compact"))
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.command))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import os
+import runpy
+
+from constants import keys as keys_module
+from services import pool
+from services.pool import pool_settings
+
+
+def load_keys(monkeypatch, **env):
+    """KEYS as a process started with this environment would read them."""
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    keys = runpy.run_path(keys_module.__file__)["KEYS"]
+    for name in ("WEB_CONCURRENCY", "DB_CONNECTION_BUDGET", "DB_POOL_MIN_SIZE", "DB_POOL_MAX_SIZE"):
+        monkeypatch.setitem(pool.KEYS, name, keys[name])
+
+
+def test_single_process_keeps_its_pool_on_many_cores(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 128)
+    load_keys(monkeypatch, DB_CONNECTION_BUDGET="90", DB_POOL_MIN_SIZE="10", DB_POOL_MAX_SIZE="10")
+    settings = pool_settings()
+    assert (settings["min_size"], settings["max_size"]) == (10, 10)
+
+
+def test_workers_share_the_budget(monkeypatch):
+    load_keys(monkeypatch, WEB_CONCURRENCY="16", DB_CONNECTION_BUDGET="90", DB_POOL_MIN_SIZE="10", DB_POOL_MAX_SIZE="10")
+    settings = pool_settings()
+    assert (settings["min_size"], settings["max_size"]) == (4, 4)
+
+
+def test_too_small_budget_clamps_instead_of_failing(monkeypatch, caplog):
+    load_keys(monkeypatch, WEB_CONCURRENCY="100", DB_CONNECTION_BUDGET="90", DB_POOL_MIN_SIZE="10", DB_POOL_MAX_SIZE="10")
+    settings = pool_settings()
+    assert (settings["min_size"], settings["max_size"]) == (1, 1)
+    assert "leaves no pooled connections" in caplog.text
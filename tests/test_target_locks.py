@@ -0,0 +1,87 @@
+"""Deleting a mission while its last target is finished must not deadlock.
+
+Needs the Postgres database configured in .env; skipped when it cannot be reached.
+"""
+import asyncio
+
+import asyncpg
+import pytest
+
+from constants.keys import KEYS
+from models.models import StatusType
+from services.breeds import BreedCatalog
+from services.db import Database
+from utils.schemas import MissionCreate
+
+
+async def stub_breeds():
+    return ["Persian"]
+
+
+async def start_database() -> Database:
+    database = Database(BreedCatalog(fetcher=stub_breeds, snapshot_path=None))
+    try:
+        await database.startup()
+    except (OSError, asyncpg.PostgresError) as e:
+        pytest.skip(f"Postgres is not available: {e}")
+    return database
+
+
+async def wait_until_blocked(conn: asyncpg.Connection, count: int):
+    for _ in range(200):
+        blocked = await conn.fetchval(
+            "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND wait_event_type = 'Lock'"
+        )
+        if blocked >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("statements never blocked")
+
+
+async def race_delete_with_last_target(finish):
+    """Hold the last target locked so finish() blocks halfway, queue delete_mission behind
+    it, then release the target: with opposite lock orders the two would now deadlock."""
+    database = await start_database()
+    conn = await asyncpg.connect(KEYS["DATABASE_URL"])
+    try:
+        mission_id = await database.create_mission(MissionCreate(
+            title="race", status="pending",
+            targets=[{"name": f"t{i}", "country": "c", "status": "pending"} for i in range(2)],
+        ))
+        first, last = [row["id"] for row in await conn.fetch(
+            "SELECT id FROM targets WHERE assigned_mission = $1 ORDER BY id", mission_id
+        )]
+        await database.update_target_status(first, StatusType.FINISHED)
+
+        holder = conn.transaction()
+        await holder.start()
+        await conn.execute("SELECT 1 FROM targets WHERE id = $1 FOR UPDATE", last)
+        monitor = await asyncpg.connect(KEYS["DATABASE_URL"])
+        try:
+            finishing = asyncio.ensure_future(finish(database, last))
+            await wait_until_blocked(monitor, 1)
+            deleting = asyncio.ensure_future(database.delete_mission(mission_id))
+            await wait_until_blocked(monitor, 2)
+        finally:
+            await monitor.close()
+        await holder.commit()
+        results = await asyncio.gather(finishing, deleting, return_exceptions=True)
+        assert not [e for e in results if isinstance(e, asyncpg.DeadlockDetectedError)]
+        assert not [e for e in results if isinstance(e, Exception)], results
+        status = await conn.fetchval("SELECT status::text FROM missions WHERE id = $1", mission_id)
+        assert status == "cancelled"
+    finally:
+        await conn.close()
+        await database.shutdown()
+
+
+def test_delete_mission_against_finishing_last_target():
+    asyncio.run(race_delete_with_last_target(
+        lambda database, target_id: database.update_target_status(target_id, StatusType.FINISHED)
+    ))
+
+
+def test_delete_mission_against_batch_finishing_last_target():
+    asyncio.run(race_delete_with_last_target(
+        lambda database, target_id: database.update_target_statuses([(target_id, StatusType.FINISHED)])
+    ))
@@ -0,0 +1,102 @@
+import json
+from typing import Any, List, Tuple, Type
+
+from fastapi import Request
+from pydantic import BaseModel, ValidationError
+
+from constants.keys import KEYS
+from utils.schemas import BulkItemResult, BulkResult, TargetStatusBatchResult, TargetStatusItemResult
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def read_bulk_payload(request: Request) -> List[Any]:
+    """Read a JSON array or an NDJSON stream of items from the request body."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        items = await _read_ndjson(request)
+    else:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise ValueError("Body must be a JSON array")
+        if not isinstance(items, list):
+            raise ValueError("Body must be a JSON array")
+    if len(items) > KEYS["BULK_MAX_ITEMS"]:
+        raise ValueError(f"Too many items, the limit is {KEYS['BULK_MAX_ITEMS']}")
+    return items
+
+
+async def _read_ndjson(request: Request) -> List[Any]:
+    items, buffer = [], b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            _append_ndjson_line(items, line)
+        if len(items) > KEYS["BULK_MAX_ITEMS"]:
+            break
+    _append_ndjson_line(items, buffer)
+    return items
+
+
+def _append_ndjson_line(items: List[Any], line: bytes):
+    if not line.strip():
+        return
+    try:
+        items.append(json.loads(line))
+    except ValueError as e:
+        items.append(_InvalidLine(str(e)))
+
+
+class _InvalidLine:
+    def __init__(self, error: str):
+        self.error = error
+
+
+def validate_items(items: List[Any], model: Type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], List[BulkItemResult]]:
+    """Split raw items into validated models (with their index) and per-item errors."""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        if isinstance(item, _InvalidLine):
+            errors.append(BulkItemResult(index=index, status="error", error=f"Invalid JSON: {item.error}"))
+            continue
+        try:
+            valid.append((index, model.model_validate(item)))
+        except ValidationError as e:
+            errors.append(BulkItemResult(index=index, status="error", error=_format_validation_error(e)))
+    return valid, errors
+
+
+def collect_results(indexes: List[int], outcomes: List[Any], errors: List[BulkItemResult]) -> BulkResult:
+    """Merge database outcomes (ids or ValueErrors) with validation errors, ordered by item index."""
+    results = list(errors)
+    for index, outcome in zip(indexes, outcomes):
+        if isinstance(outcome, Exception):
+            results.append(BulkItemResult(index=index, status="error", error=str(outcome)))
+        else:
+            results.append(BulkItemResult(index=index, status="created", id=outcome))
+    results.sort(key=lambda result: result.index)
+    failed = sum(result.status == "error" for result in results)
+    return BulkResult(created=len(results) - failed, failed=failed, items=results)
+
+
+def collect_status_results(
+    indexes: List[int], target_ids: List[int], outcomes: List[Any], errors: List[BulkItemResult]
+) -> TargetStatusBatchResult:
+    """Like collect_results, for target status changes whose outcomes are mission ids or ValueErrors."""
+    results = [TargetStatusItemResult(**error.model_dump()) for error in errors]
+    for index, target_id, outcome in zip(indexes, target_ids, outcomes):
+        if isinstance(outcome, Exception):
+            results.append(TargetStatusItemResult(index=index, status="error", id=target_id, error=str(outcome)))
+        else:
+            results.append(TargetStatusItemResult(index=index, status="updated", id=target_id, mission_id=outcome))
+    results.sort(key=lambda result: result.index)
+    failed = sum(result.status == "error" for result in results)
+    return TargetStatusBatchResult(updated=len(results) - failed, failed=failed, items=results)
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'item'}: {e['msg']}" for e in error.errors()
+    )
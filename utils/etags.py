@@ -0,0 +1,17 @@
+import hashlib
+from typing import Mapping, Optional
+
+
+def versions_etag(versions: Mapping[str, int]) -> str:
+    """Strong ETag for a response built only from tables at these versions."""
+    key = ";".join(f"{table}={versions[table]}" for table in sorted(versions))
+    return '"%s"' % hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names etag (weak comparison, as RFC 9110 asks for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
@@ -0,0 +1,78 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(last_id: int, **position) -> str:
+    raw = json.dumps({"id": last_id, **position}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_position(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+        last_id = position["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_id, int) or last_id < 0:
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Return the id to continue after, 0 for the first page."""
+    if not cursor:
+        return 0
+    return _decode_position(cursor)["id"]
+
+
+def decode_ranked_cursor(cursor: Optional[str]) -> Optional[Tuple[float, int]]:
+    """Return the (rank, id) to continue after, None for the first page."""
+    if not cursor:
+        return None
+    position = _decode_position(cursor)
+    rank = position.get("rank")
+    if not isinstance(rank, (int, float)) or isinstance(rank, bool):
+        raise ValueError("Invalid cursor")
+    return float(rank), position["id"]
+
+
+def decode_created_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Return the (created_at, id) to continue after, None for the first page."""
+    if not cursor:
+        return None
+    position = _decode_position(cursor)
+    try:
+        created_at = datetime.fromisoformat(position["created_at"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if created_at.tzinfo is None:
+        raise ValueError("Invalid cursor")
+    return created_at, position["id"]
+
+
+def paginate(rows: Sequence, limit: int) -> Tuple[List, Optional[str]]:
+    """Split rows fetched with ``limit + 1`` into the page and the cursor of the next one."""
+    items = list(rows[:limit])
+    next_cursor = encode_cursor(items[-1]["id"]) if len(rows) > limit else None
+    return items, next_cursor
+
+
+def paginate_ranked(rows: Sequence, limit: int) -> Tuple[List, Optional[str]]:
+    """Like paginate, for rows ordered by rank and then id (both descending)."""
+    items = list(rows[:limit])
+    next_cursor = encode_cursor(items[-1]["id"], rank=items[-1]["rank"]) if len(rows) > limit else None
+    return items, next_cursor
+
+
+def paginate_created(rows: Sequence, limit: int) -> Tuple[List, Optional[str]]:
+    """Like paginate, for rows ordered by created_at and then id."""
+    items = list(rows[:limit])
+    next_cursor = encode_cursor(items[-1]["id"], created_at=items[-1]["created_at"].isoformat()) if len(rows) > limit else None
+    return items, next_cursor
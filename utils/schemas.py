@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, validator
 from typing import Union, List, Optional, Dict, Any
 from enum import Enum
+from datetime import datetime
 
 # Import from models module
 from models.models import Cat, Mission, Target, Note, StatusType
@@ -18,6 +19,20 @@ class CatResponse(BaseModel):
     breed: str
     salary: int
 
+class CatPage(BaseModel):
+    items: List[CatResponse]
+    next_cursor: Optional[str] = None
+
+class AvailableCat(CatResponse):
+    active_missions: int
+
+class AvailableCatList(BaseModel):
+    items: List[AvailableCat]
+
+class AutoAssignResult(BaseModel):
+    mission_id: int
+    cat: AvailableCat
+
 class TargetCreate(BaseModel):
     status: StatusType
     name: str = Field(..., min_length=1, max_length=255, description="Target name")
@@ -35,6 +50,10 @@ class MissionResponse(BaseModel):
     status: str
     title: str
 
+class MissionPage(BaseModel):
+    items: List[MissionResponse]
+    next_cursor: Optional[str] = None
+
 class TargetResponse(BaseModel):
     id: int
     assigned_mission: int
@@ -50,6 +69,28 @@ class NoteResponse(BaseModel):
     id: int
     target_id: int
     message: str
+    created_at: datetime
+
+class TargetDetailResponse(TargetResponse):
+    notes: Optional[List[NoteResponse]] = None
+
+class MissionDetailResponse(MissionResponse):
+    targets: Optional[List[TargetDetailResponse]] = None
+
+class MissionDetailPage(BaseModel):
+    items: List[MissionDetailResponse]
+    next_cursor: Optional[str] = None
+
+class NotePage(BaseModel):
+    items: List[NoteResponse]
+    next_cursor: Optional[str] = None
+
+class NoteSearchHit(NoteResponse):
+    rank: float
+
+class NoteSearchPage(BaseModel):
+    items: List[NoteSearchHit]
+    next_cursor: Optional[str] = None
 
 class SalaryUpdate(BaseModel):
     salary: int = Field(..., gt=0, description="New salary must be positive")
@@ -60,6 +101,29 @@ class StatusUpdate(BaseModel):
 class CatAssignment(BaseModel):
     cat_id: int = Field(..., gt=0, description="Cat ID to assign")
 
+class BulkItemResult(BaseModel):
+    index: int
+    status: str
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    items: List[BulkItemResult]
+
+class TargetStatusChange(BaseModel):
+    target_id: int = Field(..., gt=0, description="Target ID")
+    status: StatusType
+
+class TargetStatusItemResult(BulkItemResult):
+    mission_id: Optional[int] = None
+
+class TargetStatusBatchResult(BaseModel):
+    updated: int
+    failed: int
+    items: List[TargetStatusItemResult]
+
 
 #
 
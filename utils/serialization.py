@@ -0,0 +1,35 @@
+from typing import Iterable, List, Mapping, Optional, Type
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+class ORJSONBytesResponse(Response):
+    """Response whose body is already-encoded JSON; skips response_model validation and re-encoding."""
+    media_type = "application/json"
+
+
+def record_to_dict(record: Mapping, model: Type[BaseModel]) -> dict:
+    return {field: record[field] for field in model.model_fields}
+
+
+def record_response(record: Mapping, model: Type[BaseModel]) -> ORJSONBytesResponse:
+    return ORJSONBytesResponse(orjson.dumps(record_to_dict(record, model)))
+
+
+def page_response(records: Iterable[Mapping], model: Type[BaseModel], next_cursor: Optional[str]) -> ORJSONBytesResponse:
+    fields = tuple(model.model_fields)
+    items = [{field: record[field] for field in fields} for record in records]
+    return ORJSONBytesResponse(orjson.dumps({"items": items, "next_cursor": next_cursor}))
+
+
+def document_page_response(documents: List[str], next_cursor: Optional[str]) -> ORJSONBytesResponse:
+    """Wrap JSON documents rendered by Postgres into a page without decoding them."""
+    body = b'{"items":[' + ",".join(documents).encode() + b'],"next_cursor":' + orjson.dumps(next_cursor) + b"}"
+    return ORJSONBytesResponse(body)
+
+
+def sse_message(event: dict, cursor: str) -> bytes:
+    """Encode an event as a Server-Sent Events message whose id is the stream cursor after it."""
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (cursor.encode(), event["kind"].encode(), orjson.dumps(event))